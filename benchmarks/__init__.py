@@ -0,0 +1,4 @@
+"""
+benchmarks for UnreachablePathVisitor, run on synthetic programs. see generator.py for the programs and runner.py
+for what is measured. run with `python -m benchmarks --help`.
+"""
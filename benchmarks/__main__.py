@@ -0,0 +1,41 @@
+import argparse
+import json
+import sys
+from benchmarks.runner import SUITE, compare, run_suite
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Time UnreachablePathVisitor on synthetic programs.')
+    parser.add_argument('cases', nargs='*', help=f'cases to run (default: all of {", ".join(SUITE)})')
+    parser.add_argument('-o', '--output', default=None, help='file to write the results to, as JSON')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, the best time is kept (default: 3)')
+    parser.add_argument('--no-memory', action='store_true', help='skip measuring peak memory')
+    parser.add_argument('--compare', default=None, help='baseline results to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='factor by which a metric may grow before it is a regression (default: 1.25)')
+    args = parser.parse_args()
+
+    results = run_suite(repeat=args.repeat, memory=not args.no_memory, names=args.cases or None)
+    output = json.dumps(results, indent=2)
+
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as file:
+            file.write(output)
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+ARGS = 3
+
+
+def generate_program(functions=1, depth=0, sequential_ifs=0, elif_chain=0, loop_nesting=0, call_fanout=0):
+    """
+    returns the source of a module of synthetic functions, each shaped by the given parameters.
+
+    functions: the number of top-level functions analysed.
+    depth: the nesting depth of if statements.
+    sequential_ifs: the number of if statements one after the other.
+    elif_chain: the length of an if-elif-else chain.
+    loop_nesting: the nesting depth of alternating while and for loops.
+    call_fanout: the number of helper functions each function calls.
+
+    every function also ends with a guard that the analysis should find unreachable, so results can be checked.
+    """
+    lines = []
+
+    for k in range(call_fanout):
+        lines += [
+            f'def helper{k}(n):',
+            f'    if n > {k}:',
+            f'        return n - {k}',
+            f'    return {k} - n',
+            '',
+        ]
+
+    for f in range(functions):
+        lines += generate_function(f'example{f}', depth, sequential_ifs, elif_chain, loop_nesting, call_fanout)
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def generate_function(name, depth, sequential_ifs, elif_chain, loop_nesting, call_fanout):
+    args = ', '.join(arg(i) for i in range(ARGS))
+    lines = [f'def {name}({args}):', '    y = 0']
+
+    indent = '    '
+    for d in range(depth):
+        lines.append(f'{indent}if {arg(d)} > {d}:')
+        indent += '    '
+    lines.append(f'{indent}y = y + 1')
+
+    for i in range(sequential_ifs):
+        lines += [
+            f'    if {arg(i)} > {i}:',
+            f'        y = y + 1',
+        ]
+
+    for i in range(elif_chain):
+        keyword = 'if' if i == 0 else 'elif'
+        lines += [
+            f'    {keyword} {arg(0)} > {elif_chain - i}:',
+            f'        y = y + {i}',
+        ]
+    if elif_chain > 0:
+        lines += [
+            '    else:',
+            '        y = y - 1',
+        ]
+
+    indent = '    '
+    for d in range(loop_nesting):
+        if d % 2 == 0:
+            lines.append(f'{indent}while {arg(d)} > y:')
+        else:
+            lines.append(f'{indent}for i{d} in range(y, {arg(d)}):')
+        indent += '    '
+    if loop_nesting > 0:
+        lines.append(f'{indent}y = y + 1')
+
+    for k in range(call_fanout):
+        lines.append(f'    y = y + helper{k}({arg(k)})')
+
+    lines += [
+        f'    if {arg(0)} > 0 and {arg(0)} < 0:',
+        '        return y',
+        '    return 0',
+    ]
+
+    return lines
+
+
+def arg(i):
+    return 'x' + str(i % ARGS)
@@ -0,0 +1,94 @@
+import ast
+import time
+import tracemalloc
+from path_visitor import UnreachablePathVisitor
+from benchmarks.generator import generate_program
+
+# the default suite: each case is a set of generate_program parameters, plus visitor options under 'options'
+SUITE = {
+    'baseline': {},
+    'nested_depth_8': {'depth': 8},
+    'sequential_ifs_16': {'sequential_ifs': 16},
+    'sequential_ifs_16_merge': {'sequential_ifs': 16, 'options': {'merge': True}},
+    'elif_chain_20': {'elif_chain': 20},
+    'loop_nesting_4': {'loop_nesting': 4},
+    'call_fanout_10': {'call_fanout': 10},
+    'functions_50': {'functions': 50, 'sequential_ifs': 2},
+}
+
+
+def run_case(params, repeat=3, memory=True):
+    """
+    analyses the program generated from params, and returns its metrics: the best wall time of repeat runs in
+    seconds, the number of queries, of checks that reached z3 and of forked visitors, the peak memory allocated by
+    python during a separate run in bytes (if memory is True), and the unreachable lines found.
+    """
+    params = dict(params)
+    options = params.pop('options', {})
+    tree = ast.parse(generate_program(**params))
+
+    best = None
+    for _ in range(repeat):
+        visitor = UnreachablePathVisitor(**options)
+        start = time.perf_counter()
+        output = visitor.visit(tree)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    metrics = {
+        'time': best,
+        'queries': visitor.stats['queries'],
+        'solver_checks': visitor.stats['solver_checks'],
+        'forks': visitor.stats['forks'],
+        'peak_memory': None,
+        'unreachable_lines': len(output),
+    }
+
+    if memory:
+        # tracing slows the analysis down, so memory is measured in a run of its own
+        tracemalloc.start()
+        UnreachablePathVisitor(**options).visit(tree)
+        metrics['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return metrics
+
+
+def run_suite(suite=None, repeat=3, memory=True, names=None):
+    suite = SUITE if suite is None else suite
+    results = {}
+
+    for name, params in suite.items():
+        if names is None or name in names:
+            results[name] = {'params': params, 'metrics': run_case(params, repeat, memory)}
+
+    return results
+
+
+def compare(results, baseline, threshold=1.25, min_time=0.01):
+    """
+    returns a list of regression messages for every metric of results that got worse than in baseline by more than
+    the threshold factor. times below min_time seconds are too noisy to compare.
+    """
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        old, new = baseline[name]['metrics'], result['metrics']
+
+        if new['unreachable_lines'] != old['unreachable_lines']:
+            regressions.append(f'{name}: unreachable lines changed from {old["unreachable_lines"]} '
+                               f'to {new["unreachable_lines"]}')
+
+        for metric in ['time', 'solver_checks', 'forks', 'peak_memory']:
+            if old.get(metric) is None or new.get(metric) is None:
+                continue
+            if metric == 'time' and max(old[metric], new[metric]) < min_time:
+                continue
+
+            if new[metric] > old[metric] * threshold:
+                regressions.append(f'{name}: {metric} went from {old[metric]} to {new[metric]}')
+
+    return regressions
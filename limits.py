@@ -0,0 +1,124 @@
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from z3 import get_param, set_param
+
+
+class AnalysisTimeout(Exception):
+    pass
+
+
+def raise_timeout(signum, frame):
+    raise AnalysisTimeout()
+
+
+@contextmanager
+def time_limit(seconds):
+    """
+    raises AnalysisTimeout in the calling code once the given number of seconds have passed. z3 doesn't return to
+    python while it is solving, so the same limit is also set as z3's own timeout for each query.
+
+    the alarm only works on the main thread of platforms with setitimer. elsewhere, only z3's timeout applies. an
+    alarm going off inside z3's bindings can be swallowed or wrapped in another exception, so it keeps going off
+    until the code stops, and any exception raised after the deadline is turned into AnalysisTimeout.
+    """
+    if seconds is None:
+        yield
+        return
+
+    use_alarm = hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread()
+    deadline = time.monotonic() + seconds
+    previous_timeout = get_param('timeout')
+    set_param('timeout', max(1, int(seconds * 1000)))
+
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, seconds, 0.1)
+
+    try:
+        yield
+    except AnalysisTimeout:
+        raise
+    except Exception as e:
+        if time.monotonic() >= deadline:
+            raise AnalysisTimeout() from e
+        raise
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+        set_param('timeout', int(previous_timeout))
+
+
+class Budget:
+    """
+    the limits on the time of an analysis and of each z3 query in it. once the time of the file or of the top-level
+    function being analysed has run out, the queries that would reach z3 come back unknown at once (see
+    PathSolver.check), and branches are merged instead of forked, so the analysis finishes soon after with the lines
+    decided so far. an unknown query leaves both of its branches reachable, so no line is reported unreachable
+    because of a limit.
+
+    query_timeout: z3's time limit for each query, in seconds, or None.
+    query_rlimit: z3's resource limit for each query, or None. unlike a time limit, it stops z3 at the same point on
+        any machine, so the results don't depend on its load.
+    function_time: the time limit for each top-level function, in seconds, or None.
+    file_deadline: the time.monotonic() time at which the budget of the file runs out, or None.
+    function_deadline: the time at which the budget of the top-level function being analysed runs out, or None.
+    """
+
+    def __init__(self, query_timeout=None, query_rlimit=None, function_time=None, file_time=None):
+        self.query_timeout: float | None = query_timeout
+        self.query_rlimit: int | None = query_rlimit
+        self.function_time: float | None = function_time
+        self.file_deadline = None if file_time is None else time.monotonic() + file_time
+        self.function_deadline: float | None = None
+
+    def start_function(self):
+        if self.function_time is not None:
+            self.function_deadline = time.monotonic() + self.function_time
+
+    def end_function(self):
+        self.function_deadline = None
+
+    def get_deadline(self):
+        deadlines = [d for d in (self.file_deadline, self.function_deadline) if d is not None]
+        return min(deadlines, default=None)
+
+    def spent(self):
+        deadline = self.get_deadline()
+        return deadline is not None and time.monotonic() >= deadline
+
+    def get_timeout(self, elapsed=0.0):
+        """
+        returns the time left for a query that has run for elapsed seconds already, in seconds: the query timeout,
+        cut down to the time left in the budget. None if neither is limited.
+        """
+        timeout = None if self.query_timeout is None else self.query_timeout - elapsed
+        deadline = self.get_deadline()
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            timeout = left if timeout is None else min(timeout, left)
+
+        return None if timeout is None else max(0.0, timeout)
+
+    def configure(self, solver):
+        """
+        sets z3's limits for the next query on solver: the query timeout, cut down to the time left in the budget,
+        and the resource limit.
+        """
+        timeout = self.get_timeout()
+        if timeout is not None:
+            solver.set('timeout', max(1, int(timeout * 1000)))
+        if self.query_rlimit is not None:
+            solver.set('rlimit', self.query_rlimit)
+
+    def get_options(self):
+        """
+        returns the keyword arguments of UnreachablePathVisitor setting up a budget with the same limits and the time
+        left in the file's.
+        """
+        file_time = None if self.file_deadline is None else max(0.0, self.file_deadline - time.monotonic())
+        return {'query_timeout': self.query_timeout, 'query_rlimit': self.query_rlimit,
+                'function_budget': self.function_time, 'file_budget': file_time}
@@ -0,0 +1,220 @@
+from collections import Counter
+
+
+class AnalysisHooks:
+    """
+    callbacks invoked by UnreachablePathVisitor and PathSolver during an analysis. every callback does nothing here;
+    subclass this and override the events of interest, then pass an instance as the visitor's hooks option.
+
+    node arguments are the ast nodes being visited when the event happened, or None if there isn't one.
+    """
+
+    def on_check(self, node, result, duration, source, statistics):
+        """
+        called after every satisfiability query.
+
+        result: sat, unsat or unknown.
+        duration: the time the query took, in seconds.
+        source: 'solver' if the query reached z3, 'cache' if it was answered by the QueryCache, 'witness' if it was
+            satisfied by a witness of the PathSampler, 'sample' if it was proven satisfiable by a sample, or 'budget'
+            if it came back unknown because the Budget had run out.
+        statistics: z3's statistics for the query (the growth of each counter, and the memory in use), or an empty
+            dictionary if the query didn't reach z3.
+        """
+
+    def on_fork(self, node):
+        """
+        called whenever a visitor is forked (a top-level function starting, or a branch splitting a path).
+        """
+
+    def on_call(self, node, func, summarised, duration):
+        """
+        called after every call to a user-defined function.
+
+        func: the called function's ast.FunctionDef node.
+        summarised: True if the function's summary was built by this call, False if it came from the cache.
+        duration: the time the call took, including summarising, in seconds.
+        """
+
+    def on_loop(self, node, duration):
+        """
+        called after every while or for loop, with the time the loop took in seconds.
+        """
+
+    def on_enter(self, func):
+        """
+        called when the analysis of a function's body starts, either as a top-level or nested function, or to
+        summarise it for a call. func is the function's ast.FunctionDef node.
+        """
+
+    def on_exit(self, func):
+        """
+        called when the analysis of a function's body started by on_enter ends.
+        """
+
+    def worker_hooks(self):
+        """
+        returns picklable hooks to use when a function is analysed in a worker process, or None to not use any. the
+        worker's hooks are sent back and passed to merge_worker once the function is done.
+        """
+        return None
+
+    def merge_worker(self, hooks):
+        pass
+
+
+class MetricsHooks(AnalysisHooks):
+    """
+    hooks that count every event and add up their durations, along with z3's statistics, for reporting.
+
+    counts: the number of each kind of event.
+    durations: the total time of each kind of event, in seconds.
+    z3_statistics: z3's counters summed over every query, and the largest memory figures seen.
+    """
+
+    MAXIMUM_STATISTICS = {'memory', 'max memory'}
+
+    def __init__(self):
+        self.counts = Counter()
+        self.durations = Counter()
+        self.z3_statistics = Counter()
+
+    def on_check(self, node, result, duration, source, statistics):
+        self.counts['checks'] += 1
+        self.counts[f'checks_{source}'] += 1
+        self.counts[f'checks_{result}'] += 1
+        self.durations['checks'] += duration
+        self.durations[f'checks_{source}'] += duration
+        self.add_statistics(statistics)
+
+    def on_fork(self, node):
+        self.counts['forks'] += 1
+
+    def on_call(self, node, func, summarised, duration):
+        self.counts['calls'] += 1
+        self.counts['calls_summarised'] += summarised
+        self.durations['calls'] += duration
+
+    def on_loop(self, node, duration):
+        self.counts['loops'] += 1
+        self.durations['loops'] += duration
+
+    def add_statistics(self, statistics):
+        for key, value in statistics.items():
+            if key in self.MAXIMUM_STATISTICS:
+                self.z3_statistics[key] = max(self.z3_statistics[key], value)
+            else:
+                self.z3_statistics[key] += value
+
+    def worker_hooks(self):
+        return MetricsHooks()
+
+    def merge_worker(self, hooks):
+        self.counts.update(hooks.counts)
+        self.durations.update(hooks.durations)
+        self.add_statistics(hooks.z3_statistics)
+
+    def as_dict(self):
+        return {
+            'counts': dict(self.counts),
+            'durations': dict(self.durations),
+            'z3_statistics': dict(self.z3_statistics),
+        }
+
+
+class LineProfiler(MetricsHooks):
+    """
+    hooks that attribute the analysis' cost to the source lines that caused it, on top of the totals of MetricsHooks.
+
+    lines: counters for each line number of a branch, loop or call: 'checks' and 'solver_checks' (the queries made
+        there, and the ones that reached z3), 'check_time' (their total duration in seconds), 'forks', 'calls' and
+        'call_time' (the total duration of calls, including the time spent summarising the called function).
+    functions: the name of the function each line was first seen in.
+    stacks: the time spent in queries, in microseconds, for each stack of functions being analysed, in the folded
+        format of flame graph tools: the function names, outermost first, then the line of the query, separated by
+        semicolons.
+    stack: the functions being analysed at the moment.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lines: dict[int, Counter] = {}
+        self.functions: dict[int, str] = {}
+        self.stacks = Counter()
+        self.stack: list[str] = []
+
+    def on_check(self, node, result, duration, source, statistics):
+        super().on_check(node, result, duration, source, statistics)
+
+        line = self.get_line(getattr(node, 'lineno', 0))
+        line['checks'] += 1
+        line['solver_checks'] += source == 'solver'
+        line['check_time'] += duration
+
+        frames = self.stack + ['line ' + str(getattr(node, 'lineno', 0))]
+        self.stacks[';'.join(frames)] += round(duration * 1e6)
+
+    def on_fork(self, node):
+        super().on_fork(node)
+        self.get_line(getattr(node, 'lineno', 0))['forks'] += 1
+
+    def on_call(self, node, func, summarised, duration):
+        super().on_call(node, func, summarised, duration)
+
+        line = self.get_line(getattr(node, 'lineno', 0))
+        line['calls'] += 1
+        line['call_time'] += duration
+
+    def on_enter(self, func):
+        self.stack.append(func.name)
+
+    def on_exit(self, func):
+        self.stack.pop()
+
+    def get_line(self, lineno, function=None):
+        """
+        returns the counters of a line, creating them if needed. events without a node are counted under line 0.
+        """
+        if lineno not in self.lines:
+            self.lines[lineno] = Counter()
+            self.functions[lineno] = function or (self.stack[-1] if self.stack else '<module>')
+
+        return self.lines[lineno]
+
+    def worker_hooks(self):
+        return LineProfiler()
+
+    def merge_worker(self, hooks):
+        super().merge_worker(hooks)
+
+        for lineno, counters in hooks.lines.items():
+            self.get_line(lineno, hooks.functions[lineno]).update(counters)
+
+        self.stacks.update(hooks.stacks)
+
+    def hotspots(self, limit=None):
+        """
+        returns (line number, function name, counters) triples sorted by the time spent on each line, the costliest
+        first. the time of a line is that of its queries plus that of its calls.
+        """
+        ret = [(lineno, self.functions[lineno], counters) for lineno, counters in self.lines.items()]
+        ret.sort(key=lambda item: (-(item[2]['check_time'] + item[2]['call_time']), item[0]))
+        return ret[:limit]
+
+    def format_hotspots(self, limit=20):
+        rows = [f'{"line":>6} {"function":<20} {"checks":>8} {"z3":>8} {"check s":>10} {"forks":>7} {"calls":>7} '
+                f'{"call s":>10}']
+
+        for lineno, function, counters in self.hotspots(limit):
+            rows.append(f'{lineno:>6} {function[:20]:<20} {counters["checks"]:>8} {counters["solver_checks"]:>8} '
+                        f'{counters["check_time"]:>10.4f} {counters["forks"]:>7} {counters["calls"]:>7} '
+                        f'{counters["call_time"]:>10.4f}')
+
+        return '\n'.join(rows)
+
+    def format_stacks(self, root=None):
+        """
+        returns the folded stacks, one per line, with root prepended to each stack if given.
+        """
+        prefix = '' if root is None else root + ';'
+        return ''.join(f'{prefix}{stack} {value}\n' for stack, value in sorted(self.stacks.items()))
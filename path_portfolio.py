@@ -0,0 +1,207 @@
+import functools
+import operator
+import queue
+import subprocess
+import sys
+import threading
+import time
+from z3 import *
+
+# how a relaxed term is built from its relaxed children, for the operators whose meaning over the reals extends
+# their meaning over the ints, see relax
+RELAXED_OPERATORS = {
+    Z3_OP_ADD: Sum, Z3_OP_SUB: lambda *args: functools.reduce(operator.sub, args), Z3_OP_MUL: Product,
+    Z3_OP_UMINUS: operator.neg, Z3_OP_LE: operator.le, Z3_OP_LT: operator.lt, Z3_OP_GE: operator.ge,
+    Z3_OP_GT: operator.gt, Z3_OP_EQ: operator.eq, Z3_OP_DISTINCT: Distinct, Z3_OP_AND: And, Z3_OP_OR: Or,
+    Z3_OP_NOT: Not, Z3_OP_IMPLIES: Implies, Z3_OP_XOR: Xor, Z3_OP_ITE: If, Z3_OP_TO_REAL: lambda arg: arg,
+}
+
+RESULTS = {'sat': sat, 'unsat': unsat}
+
+
+class SolverPortfolio:
+    """
+    races several solver configurations on the queries z3 doesn't decide within a short first attempt, and takes
+    the first of them to find the query sat or unsat. most queries are decided well within the first attempt, and
+    never reach the portfolio (see PathSolver.check_solver). on the few that aren't, z3's time varies by orders of
+    magnitude with its configuration and its state: a fresh solver often decides at once a query the incremental
+    solver of the path, with the lemmas of every earlier query, takes seconds on.
+
+    each configuration runs in a process of its own (see solve), given the query in smt-lib form, and the others
+    are killed as soon as one of them decides it. z3 can't be interrupted across processes, and its nonlinear
+    solvers stall when several of them run in threads of the same process.
+
+    the configurations, in the order they're picked (see get_configurations):
+        'fresh': a new solver for the logic of the query, the configuration of the first attempt without its state.
+        'tactic': z3's tactic for nonlinear arithmetic over the ints (qfnia) or over the reals (qfnra-nlsat).
+        'reals': for nonlinear queries over the ints, the query over the reals, solved by nlsat (see relax). it is
+            unsat if the relaxed query is, and sat if the relaxed query has a model with integer values.
+        'arith': a solver with z3's previous arithmetic solver.
+        'seed1', 'seed2', ...: solvers with other random seeds.
+
+    processes: the number of configurations raced on each query.
+    first_attempt: the time limit of the first attempt on a query, in seconds.
+    """
+
+    def __init__(self, processes=4, first_attempt=0.25):
+        self.processes = processes
+        self.first_attempt = first_attempt
+
+    def configure(self, solver, timeout=None):
+        """
+        limits the next query on solver to the first attempt, unless timeout, the time it is limited to otherwise,
+        is shorter. returns whether it was limited.
+        """
+        if timeout is not None and timeout <= self.first_attempt:
+            return False
+
+        solver.set('timeout', max(1, int(self.first_attempt * 1000)))
+        return True
+
+    def get_configurations(self, logic):
+        """
+        returns the names of the configurations raced on a query of logic, the logic of PathSolver's solver for it.
+        """
+        names = ['fresh']
+        if logic in ('QF_NIA', 'QF_NRA'):
+            names.append('tactic')
+        if logic == 'QF_NIA':
+            names.append('reals')
+        names.append('arith')
+
+        names += ['seed%d' % i for i in range(1, self.processes - len(names) + 1)]
+        return names[:self.processes]
+
+    def race(self, query, logic, timeout=None, rlimit=None):
+        """
+        returns the result of the first configuration to decide query within timeout seconds, and the name of the
+        configuration. the result is unknown, and the name None, if none of them does. rlimit, if given, is z3's
+        resource limit in each configuration.
+        """
+        solver = Solver()
+        solver.add(*query)
+        smt = solver.sexpr()
+
+        results = queue.SimpleQueue()
+        processes = []
+        threads = []
+        for name in self.get_configurations(logic):
+            args = [sys.executable, __file__, name, logic or '', str(rlimit or 0)]
+            process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                       text=True)
+            processes.append(process)
+            threads.append(threading.Thread(target=communicate, args=(process, name, smt, results), daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            for _ in processes:
+                name, result = results.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+                if result != unknown:
+                    return result, name
+        except queue.Empty:
+            pass
+        finally:
+            for process in processes:
+                process.kill()
+            for thread in threads:
+                thread.join()
+
+        return unknown, None
+
+
+def communicate(process, name, smt, results):
+    try:
+        output, _ = process.communicate(smt)
+    except (OSError, ValueError):
+        output = ''
+
+    results.put((name, RESULTS.get(output.strip(), unknown)))
+
+
+def solve(name, logic, rlimit, smt):
+    """
+    returns the result of configuration name of a SolverPortfolio on the query smt, of logic.
+    """
+    if name == 'reals':
+        parsed = Solver()
+        parsed.from_string(smt)
+        relaxed = {}
+        conds = relax(parsed.assertions(), relaxed)
+        if conds is None:
+            return unknown
+
+        solver = Tactic('qfnra-nlsat').solver()
+        solver.add(*conds)
+    elif name == 'tactic':
+        solver = Tactic('qfnia' if logic == 'QF_NIA' else 'qfnra-nlsat').solver()
+    elif logic:
+        solver = SolverFor(logic)
+    else:
+        solver = Solver()
+
+    if name == 'arith':
+        solver.set('arith.solver', 2)
+    elif name.startswith('seed'):
+        solver.set('random_seed', int(name[4:]))
+    if rlimit:
+        solver.set('rlimit', rlimit)
+
+    if name != 'reals':
+        solver.from_string(smt)
+
+    result = solver.check()
+    if result == sat and name == 'reals' and not is_integral(solver.model(), relaxed.values()):
+        return unknown
+
+    return result
+
+
+def relax(conds, relaxed):
+    """
+    returns conds with their int constants replaced by real ones, recorded in relaxed by the id of the int constant,
+    or None if they use an operator whose meaning over the reals differs, such as integer division.
+    """
+    terms = {}
+
+    def visit(expr):
+        key = expr.get_id()
+        if key in terms:
+            return terms[key]
+
+        if is_int_value(expr):
+            ret = RealVal(expr.as_long())
+        elif is_const(expr) and expr.decl().kind() == Z3_OP_UNINTERPRETED and is_int(expr):
+            ret = relaxed[key] = FreshReal(expr.decl().name())
+        elif is_const(expr) and not is_int(expr):
+            ret = expr
+        elif expr.decl().kind() in RELAXED_OPERATORS:
+            ret = RELAXED_OPERATORS[expr.decl().kind()](*[visit(child) for child in expr.children()])
+        else:
+            raise ValueError(expr.decl().name())
+
+        terms[key] = ret
+        return ret
+
+    try:
+        return [visit(cond) for cond in conds]
+    except (ValueError, RecursionError):
+        return None
+
+
+def is_integral(model, consts):
+    """
+    returns whether model gives every one of consts an integer value.
+    """
+    for const in consts:
+        value = model.eval(const, model_completion=True)
+        if not is_rational_value(value) or value.denominator_as_long() != 1:
+            return False
+
+    return True
+
+
+if __name__ == '__main__':
+    print(solve(sys.argv[1], sys.argv[2], int(sys.argv[3]), sys.stdin.read()))
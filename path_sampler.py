@@ -0,0 +1,505 @@
+import math
+import operator
+import random
+from collections import deque
+from fractions import Fraction
+from z3 import *
+
+# the largest exponent evaluated, beyond which the values grow too large to be worth it
+MAX_EXPONENT = 64
+
+# the function of a Node that can't be evaluated
+UNSUPPORTED = object()
+
+# the comparison each comparison is turned into when its sides are swapped, and when it is negated
+FLIPPED = {Z3_OP_LE: Z3_OP_GE, Z3_OP_LT: Z3_OP_GT, Z3_OP_GE: Z3_OP_LE, Z3_OP_GT: Z3_OP_LT, Z3_OP_EQ: Z3_OP_EQ}
+NEGATED = {Z3_OP_LE: Z3_OP_GT, Z3_OP_LT: Z3_OP_GE, Z3_OP_GE: Z3_OP_LT, Z3_OP_GT: Z3_OP_LE}
+
+
+class PathSampler:
+    """
+    proves queries satisfiable without z3, by evaluating them on a batch of sampled values of their constants: a
+    sample that satisfies every condition is a model, so the query is sat. when no sample does, the query is left to
+    z3, since a few samples say nothing about unsat. most branches are reachable, so most nonlinear queries, which
+    z3 is slowest on, are answered here instead (see PathSolver.check).
+
+    each subterm is evaluated once per query on the whole batch, as a list of values with one value per sample.
+    values are python ints and Fractions, so that a satisfying sample is exact. a value z3 leaves undefined, such as
+    a division by zero, is None, and fails every condition it reaches.
+
+    samples: the number of samples evaluated per query.
+    witnesses: the pool of the latest Witnesses, satisfying samples and models found by z3, newest first. along a
+        path, the next branch is often satisfied by the same witness as the previous one, so a query is first
+        evaluated on the pool (see reuse). the visitor keeps a pool for each function.
+    nodes: the Node of every subterm of the queries sampled, keyed by its id, so that a term shared by many queries
+        is only read from z3 once. the table is cleared when it holds more than size nodes.
+    random: the generator of the samples. the samples only decide which queries reach z3, never their results, so
+        the seed doesn't change the outcome of an analysis.
+    """
+
+    def __init__(self, samples=16, witnesses=8, size=65536, seed=0):
+        self.samples = samples
+        self.witnesses: deque[Witness] = deque(maxlen=witnesses)
+        self.nodes: dict[int, Node] = {}
+        self.size = size
+        self.random = random.Random(seed)
+
+    def sample(self, conds):
+        """
+        returns a sample satisfying every condition of conds, which proves them satisfiable, as a Witness added to
+        the pool, or None if none does.
+        """
+        if self.samples == 0:
+            return None
+
+        query = self.get_query(conds)
+        if query is None:
+            return None
+
+        roots, orders, constants, numbers = query
+        boundary = [0, 1, -1]
+        for number in numbers:
+            boundary += [number, number + 1, number - 1]
+
+        n = self.samples
+        bound = math.ceil(max(abs(value) for value in boundary)) * 2 + 8
+        intervals = get_intervals(roots)
+
+        values = {}
+        for const in constants:
+            values[const] = self.draw(const, intervals.get(const), boundary, bound, n)
+            if values[const] is None:
+                return None
+
+        j = evaluate(orders, values, n)
+        if j is None:
+            return None
+
+        witness = Witness(None, {const: [values[const][j]] for const in constants})
+        self.witnesses.appendleft(witness)
+        return witness
+
+    def reuse(self, conds, first=None):
+        """
+        returns the first witness satisfying every condition of conds, which proves them satisfiable, moving it to
+        the front of the pool, or None if none does. first, the witness of the path the query is made on (see
+        PathSolver.witness), is tried before the pool.
+        """
+        if self.witnesses.maxlen == 0:
+            return None
+
+        candidates = list(self.witnesses)
+        if first is not None:
+            candidates.insert(0, first)
+        if len(candidates) == 0:
+            return None
+
+        roots = [self.get_node(cond) for cond in reversed(conds)]
+        if any(root.function is UNSUPPORTED for root in roots):
+            return None
+
+        for witness in candidates:
+            if all(witness.evaluate(root) is True for root in roots):
+                if witness in self.witnesses:
+                    self.witnesses.remove(witness)
+                self.witnesses.appendleft(witness)
+                return witness
+
+        return None
+
+    def add_model(self, model):
+        """
+        returns a model found by z3 as a Witness added to the pool, or None if there is no pool.
+        """
+        if self.witnesses.maxlen == 0:
+            return None
+
+        witness = Witness(model, {})
+        self.witnesses.appendleft(witness)
+        return witness
+
+    def get_query(self, conds):
+        """
+        returns the nodes of the conditions of conds, a list of (condition node, subterm nodes) pairs to evaluate
+        them in, the constants and the numbers they use, or None if they can't be evaluated.
+
+        the subterms of each condition come children first, and only if they aren't in an earlier condition. the
+        newest conditions, the branch test last, are the likeliest to rule out a sample, so they are evaluated first.
+        """
+        roots = [self.get_node(cond) for cond in conds]
+        if any(root.function is UNSUPPORTED for root in roots):
+            return None
+
+        orders = []
+        seen = set()
+        for root in reversed(roots):
+            order = []
+            stack = [(root, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    order.append(node)
+                elif node not in seen:
+                    seen.add(node)
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in node.children)
+            orders.append((root, order))
+
+        constants = [node for node in seen if node.is_constant()]
+        numbers = [node.value for node in seen if node.is_number()]
+        return roots, orders, constants, numbers
+
+    def get_node(self, term):
+        """
+        returns the Node of a term, building the nodes of its subterms that aren't in the table yet.
+        """
+        node = self.nodes.get(term.get_id())
+        if node is not None:
+            return node
+
+        if len(self.nodes) > self.size:
+            self.nodes.clear()
+
+        stack = [(term, False)]
+        while stack:
+            term, expanded = stack.pop()
+            i = term.get_id()
+
+            if expanded:
+                node = self.nodes[i]
+                node.children = [self.nodes[child.get_id()] for child in term.children()]
+                if any(child.function is UNSUPPORTED for child in node.children):
+                    node.function = UNSUPPORTED
+                else:
+                    node.bounds = get_bounds(node)
+            elif i not in self.nodes:
+                node = Node(term)
+                self.nodes[i] = node
+
+                if node.function is not None and node.function is not UNSUPPORTED:
+                    stack.append((term, True))
+                    stack.extend((child, False) for child in term.children())
+
+        return node
+
+    def draw(self, const, interval, boundary, bound, n):
+        """
+        returns n sampled values of a constant, or None if its interval is empty. a constant bounded by the query
+        (see get_intervals) gets the ends of its interval half of the time, and values within it otherwise. other
+        constants get boundary values (0, 1, -1, and the numbers of the query and their neighbours) half of the
+        time, and random values within bound otherwise. the values of a real are mostly ints too, which python
+        computes with much faster than with Fractions.
+        """
+        if const.sort == Z3_BOOL_SORT:
+            return [self.random.random() < 0.5 for _ in range(n)]
+
+        integral = const.sort == Z3_INT_SORT
+
+        if interval is not None:
+            lower, upper = interval
+            lower = upper - bound if lower is None else lower
+            upper = lower + bound if upper is None else upper
+            if lower > upper:
+                return None
+
+            ends = [lower, upper]
+            first, last = math.ceil(lower), math.floor(upper)
+
+            values = []
+            for _ in range(n):
+                if self.random.random() < 0.5:
+                    values.append(self.random.choice(ends))
+                elif first <= last:
+                    values.append(self.random.randint(first, last))
+                else:
+                    values.append(Fraction(lower + upper) / 2)
+            return values
+
+        values = []
+        for _ in range(n):
+            if self.random.random() < 0.5:
+                value = self.random.choice(boundary)
+                if integral:
+                    value = math.floor(value)
+            elif integral or self.random.random() < 0.5:
+                value = self.random.randint(-bound, bound)
+            else:
+                value = Fraction(self.random.randint(-bound * 4, bound * 4), 4)
+            values.append(value)
+
+        return values
+
+
+class Witness:
+    """
+    values of the constants of a satisfiable query, which other queries are evaluated on by PathSampler.reuse.
+
+    model: the z3 model the values of the constants are read from, or None for a sample. a constant without a value,
+        or with one z3 gives as an algebraic number, is taken to be 0.
+    values: the value of every node evaluated on the witness, as a list of one value (see Node.function). the path
+        conditions of a query were mostly in the previous query too, so they are only evaluated once.
+    """
+
+    __slots__ = ('model', 'values')
+
+    def __init__(self, model, values):
+        self.model = model
+        self.values: dict[Node, list] = values
+
+    def evaluate(self, root):
+        """
+        returns the value of a node on the witness.
+        """
+        values = self.values
+        if root in values:
+            return values[root][0]
+
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                values[node] = node.function(*[values[child] for child in node.children])
+            elif node not in values:
+                if node.function is not None:
+                    stack.append((node, True))
+                    stack.extend((child, False) for child in node.children)
+                elif node.value is not None:
+                    values[node] = [node.value]
+                else:
+                    values[node] = [self.get_constant(node)]
+
+        return values[root][0]
+
+    def get_constant(self, const):
+        value = None if self.model is None else self.model.get_interp(const.term.decl())
+        if value is None:
+            pass
+        elif is_true(value) or is_false(value):
+            return is_true(value)
+        elif is_int_value(value):
+            return value.as_long()
+        elif is_rational_value(value):
+            value = Fraction(value.numerator_as_long(), value.denominator_as_long())
+            return value.numerator if value.denominator == 1 else value
+
+        return False if const.sort == Z3_BOOL_SORT else 0
+
+
+class Node:
+    """
+    a subterm of a query, as evaluated by PathSampler.
+
+    term: the z3 term, kept so that its id can't be reused by another term while the node is in the table.
+    function: takes the list of values of each child and returns the list of values of the term, one per sample.
+        None for constants and literals, and UNSUPPORTED for a term using an operation or a sort the sampler
+        doesn't evaluate, or with such a subterm.
+    kind, sort: the z3 kinds of the term's declaration and sort.
+    children: the nodes of the term's arguments.
+    value: the python value of a numeral or boolean literal, or None.
+    bounds: the bounds the term gives a constant if it compares it with a number, see get_bounds.
+    """
+
+    __slots__ = ('term', 'function', 'kind', 'sort', 'children', 'value', 'bounds')
+
+    def __init__(self, term):
+        self.term = term
+        self.function = None
+        self.kind = term.decl().kind()
+        self.sort = term.sort().kind()
+        self.children: list[Node] = []
+        self.value: bool | int | Fraction | None = None
+        self.bounds: tuple[Node, int | Fraction | None, int | Fraction | None] | None = None
+
+        if self.sort not in (Z3_BOOL_SORT, Z3_INT_SORT, Z3_REAL_SORT):
+            self.function = UNSUPPORTED
+        elif is_true(term) or is_false(term):
+            self.value = is_true(term)
+        elif is_int_value(term):
+            self.value = term.as_long()
+        elif is_rational_value(term):
+            value = Fraction(term.numerator_as_long(), term.denominator_as_long())
+            self.value = value.numerator if value.denominator == 1 else value
+        elif not (is_const(term) and self.kind == Z3_OP_UNINTERPRETED):
+            self.function = OPERATIONS.get(self.kind, UNSUPPORTED)
+
+    def is_number(self):
+        return self.function is None and self.value is not None and not isinstance(self.value, bool)
+
+    def is_constant(self):
+        return self.function is None and self.value is None
+
+
+def evaluate(orders, values, n):
+    """
+    evaluates a query, given as the orders of get_query, on n samples, where values maps each constant to its list of
+    values. returns the index of the first sample satisfying every condition, or None if none does.
+    """
+    satisfied = [True] * n
+
+    for root, order in orders:
+        for node in order:
+            if node.function is not None:
+                values[node] = node.function(*[values[child] for child in node.children])
+            elif node.value is not None:
+                values[node] = [node.value] * n
+
+        satisfied = [s and v is True for s, v in zip(satisfied, values[root])]
+        if not any(satisfied):
+            return None
+
+    return satisfied.index(True)
+
+
+def get_intervals(roots):
+    """
+    returns the interval each constant is bounded to by the conditions of a query, as a dictionary from the constant's
+    node to a list of its lower and upper bounds, which may be None. only the conditions, or conjuncts of a condition,
+    that bound a constant by a number (see get_bounds) are read.
+    """
+    intervals = {}
+
+    for root in roots:
+        for atom in root.children if root.kind == Z3_OP_AND else [root]:
+            if atom.bounds is None:
+                continue
+
+            const, lower, upper = atom.bounds
+            interval = intervals.setdefault(const, [None, None])
+            if lower is not None:
+                interval[0] = lower if interval[0] is None else max(interval[0], lower)
+            if upper is not None:
+                interval[1] = upper if interval[1] is None else min(interval[1], upper)
+
+    return intervals
+
+
+def get_bounds(atom):
+    """
+    returns the constant an atom compares with a number, with the lower and upper bounds it gives it (either of which
+    may be None), or None if the atom isn't such a comparison. strict bounds are moved in by 1 for an int and by 1/2
+    for a real, which leaves a few values out but keeps every value of the interval in it.
+    """
+    kind = atom.kind
+    if kind == Z3_OP_NOT:
+        atom = atom.children[0]
+        kind = NEGATED.get(atom.kind)
+
+    if kind not in FLIPPED or len(atom.children) != 2:
+        return None
+
+    const, number = atom.children
+    if const.is_number() and number.is_constant():
+        const, number, kind = number, const, FLIPPED[kind]
+    if not (const.is_constant() and number.is_number()):
+        return None
+
+    value = number.value
+    if const.sort == Z3_INT_SORT:
+        lower = {Z3_OP_GT: math.floor(value) + 1, Z3_OP_GE: math.ceil(value), Z3_OP_EQ: value}.get(kind)
+        upper = {Z3_OP_LT: math.ceil(value) - 1, Z3_OP_LE: math.floor(value), Z3_OP_EQ: value}.get(kind)
+    else:
+        step = Fraction(1, 2)
+        lower = {Z3_OP_GT: value + step, Z3_OP_GE: value, Z3_OP_EQ: value}.get(kind)
+        upper = {Z3_OP_LT: value - step, Z3_OP_LE: value, Z3_OP_EQ: value}.get(kind)
+
+    return const, lower, upper
+
+
+def lift(function):
+    """
+    returns the function applied to each sample of its arguments' values.
+    """
+    return lambda *args: [function(*row) for row in zip(*args)]
+
+
+def unary(function):
+    """
+    returns the function applied to each sample of its argument's values, undefined where the argument is.
+    """
+    return lambda xs: [None if x is None else function(x) for x in xs]
+
+
+def binary(function):
+    """
+    returns the function applied to each sample of its arguments' values, undefined where either argument is. with
+    more than two arguments, the function is applied to them from left to right.
+    """
+    def apply(xs, ys, *rest):
+        values = [None if x is None or y is None else function(x, y) for x, y in zip(xs, ys)]
+        return apply(values, *rest) if rest else values
+
+    return apply
+
+
+def all_of(*args):
+    if False in args:
+        return False
+    return None if None in args else True
+
+
+def any_of(*args):
+    if True in args:
+        return True
+    return None if None in args else False
+
+
+def ite(cond, then, otherwise):
+    if cond is None:
+        return None
+    return then if cond else otherwise
+
+
+def divide(left, right):
+    if right == 0:
+        return None
+
+    value = Fraction(left) / right
+    return value.numerator if value.denominator == 1 else value
+
+
+def int_divide(left, right):
+    # z3 rounds so that the remainder is never negative
+    if right == 0:
+        return None
+    return left // right if right > 0 else -(left // -right)
+
+
+def modulo(left, right):
+    quotient = int_divide(left, right)
+    return None if quotient is None else left - right * quotient
+
+
+def power(base, exponent):
+    if exponent != int(exponent) or abs(exponent) > MAX_EXPONENT or base == 0 and exponent <= 0:
+        return None
+    elif isinstance(base, int) and exponent < 0:
+        # undefined for ints, and left to z3 for reals held as ints
+        return None
+
+    return base ** int(exponent)
+
+
+OPERATIONS = {
+    Z3_OP_AND: lift(all_of),
+    Z3_OP_OR: lift(any_of),
+    Z3_OP_NOT: unary(operator.not_),
+    Z3_OP_IMPLIES: lift(lambda x, y: any_of(None if x is None else not x, y)),
+    Z3_OP_ITE: lift(ite),
+    Z3_OP_EQ: binary(operator.eq),
+    Z3_OP_DISTINCT: lift(lambda *xs: None if any(x is None for x in xs) else len(set(xs)) == len(xs)),
+    Z3_OP_LE: binary(operator.le),
+    Z3_OP_LT: binary(operator.lt),
+    Z3_OP_GE: binary(operator.ge),
+    Z3_OP_GT: binary(operator.gt),
+    Z3_OP_ADD: binary(operator.add),
+    Z3_OP_SUB: binary(operator.sub),
+    Z3_OP_MUL: binary(operator.mul),
+    Z3_OP_UMINUS: unary(operator.neg),
+    Z3_OP_DIV: binary(divide),
+    Z3_OP_IDIV: binary(int_divide),
+    Z3_OP_MOD: binary(modulo),
+    Z3_OP_POWER: binary(power),
+    Z3_OP_TO_REAL: unary(lambda x: x),
+    Z3_OP_TO_INT: unary(math.floor),
+    Z3_OP_IS_INT: unary(lambda x: isinstance(x, int) or x.denominator == 1),
+}
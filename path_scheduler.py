@@ -0,0 +1,145 @@
+import heapq
+from collections import Counter
+
+
+class PathScheduler:
+    """
+    a worklist of the paths through a function body explored in forking mode. each path is a visitor, queued with
+    the stack of blocks it is walking (see UnreachablePathVisitor.frames): the body, and the branches of the if
+    statements it is inside of, each with the index of the next statement to walk in it. a path forked by a branch
+    anywhere inside a statement goes on from the statement after the branch, in the block the branch is in, and then
+    from the statements after each of the blocks around it.
+
+    a path stops once it has returned. once a path has walked the whole body or returned, its output is folded into
+    the output of the function (see finish) and the path is dropped, so only the live paths are kept in memory.
+
+    a path queued at the same statement as another path with the same state (see
+    UnreachablePathVisitor.get_state_key) is folded into it instead, see UnreachablePathVisitor.subsume. paths only
+    meet when they wait at the same statement, which happens mostly with the 'bfs' and 'coverage' strategies.
+
+    strategy: the order paths are walked in. 'bfs' walks each statement on every path before the next one, 'dfs'
+        walks the newest path until it finishes, and 'coverage' walks the path whose next statement has been walked
+        the fewest times.
+    max_states: the number of live paths at which branches stop forking and are merged instead, or None.
+    worklist: a heap of (priority, sequence number, visitor, position key) entries.
+    queued: the latest queued path for each pair of position and state key.
+    live: the number of paths forked and not yet finished.
+    visits: the number of times each statement has been walked, by line.
+    spawned: the paths forked while the current statement is walked.
+    output: the lines reported on every finished path that could reach them, see finish.
+    seen: the lines reported on any finished path.
+    skipped: the lines skipped by every finished path, or None if none has finished.
+    """
+
+    STRATEGIES = ('bfs', 'dfs', 'coverage')
+
+    def __init__(self, body, strategy='bfs', max_states=None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f'unknown strategy {strategy!r}, expected one of {", ".join(self.STRATEGIES)}.')
+
+        self.body = body
+        self.strategy = strategy
+        self.max_states: int | None = max_states
+
+        self.worklist = []
+        self.queued = {}
+        self.sequence = 0
+        self.live = 0
+        self.visits = Counter()
+        self.spawned = []
+        self.output: set[int] = set()
+        self.seen: set[int] = set()
+        self.skipped: set[int] | None = None
+
+    def full(self):
+        return self.max_states is not None and self.live >= self.max_states
+
+    def spawn(self, visitor):
+        """
+        registers a path forked while the current statement is walked.
+        """
+        self.live += 1
+        self.spawned.append(visitor)
+
+    def run(self, visitor, step):
+        """
+        walks the body on visitor and every path forked from it, and returns the lines reported on all of them.
+
+        step: called with a path and a statement to walk that statement on that path.
+        """
+        self.live += 1
+        visitor.frames = [(self.body, 0)]
+        self.push(visitor)
+
+        while self.worklist:
+            _, _, visitor, key = heapq.heappop(self.worklist)
+            if self.queued.get(key) is visitor:
+                del self.queued[key]
+
+            block, index = visitor.frames[-1]
+            visitor.frames[-1] = (block, index + 1)
+            self.visits[block[index].lineno] += 1
+
+            self.spawned = []
+            step(visitor, block[index])
+
+            spawned = self.spawned
+            self.spawned = []
+
+            for child in spawned:
+                # the child no longer needs the path it was forked from
+                child.parent = None
+
+            for path in [visitor] + spawned:
+                self.push(path)
+
+        return self.output
+
+    def push(self, visitor):
+        frames = visitor.frames
+        while len(frames) > 0 and frames[-1][1] == len(frames[-1][0]):
+            frames.pop()
+
+        if len(frames) == 0:
+            self.finish(visitor)
+            return
+
+        block, index = frames[-1]
+        line = block[index].lineno
+
+        key = None
+        if self.live > 1:
+            key = (tuple((id(block), index) for block, index in frames), visitor.get_state_key())
+            other = self.queued.get(key)
+
+            if other is not None and other.subsume(visitor):
+                self.live -= 1
+                return
+
+            self.queued[key] = visitor
+
+        self.sequence += 1
+        match self.strategy:
+            case 'bfs':
+                priority = (line, self.sequence)
+            case 'dfs':
+                priority = (-self.sequence,)
+            case _:
+                priority = (self.visits[line], -self.sequence)
+
+        heapq.heappush(self.worklist, (priority, self.sequence, visitor, key))
+
+    def finish(self, visitor):
+        """
+        folds the output of a finished path into the output of the function. a line is reported if every path
+        reports it or skips it (see UnreachablePathVisitor.skipped), since a path can't reach a line it skipped.
+        """
+        self.live -= 1
+
+        new = visitor.output - self.seen
+        if self.skipped is not None:
+            new &= self.skipped
+
+        self.output = (self.output & (visitor.output | visitor.skipped)) | new
+        self.seen |= visitor.output
+        self.skipped = visitor.skipped.copy() if self.skipped is None else self.skipped & visitor.skipped
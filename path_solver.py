@@ -0,0 +1,657 @@
+import hashlib
+import time
+from collections import Counter, OrderedDict
+from z3 import *
+from limits import Budget
+from path_portfolio import SolverPortfolio
+from path_sampler import PathSampler, Witness
+
+# the theories a set of conditions uses, see get_theories
+INT, REAL, NONLINEAR = 1, 2, 4
+
+# z3 probes recognising conditions in each combination of theories, tried in order
+THEORY_PROBES = [('is-propositional', 0), ('is-qflia', INT), ('is-qflra', REAL), ('is-qflira', INT | REAL),
+                 ('is-qfnia', INT | NONLINEAR), ('is-qfnra', REAL | NONLINEAR)]
+
+# the logic z3 is configured for when a path uses each combination of theories. other combinations (nonlinear
+# arithmetic over both ints and reals, or conversions between them) use z3's default solver.
+LOGICS = {0: 'QF_FD', INT: 'QF_LIA', REAL: 'QF_LRA', INT | REAL: 'QF_LIRA', INT | NONLINEAR: 'QF_NIA',
+          REAL | NONLINEAR: 'QF_NRA'}
+
+# the reasons a query comes back unknown for, see PathSolver.undecided
+SPENT = 'the time budget ran out before the condition was checked.'
+LIMITED = 'the solver reached its time or resource limit on the condition.'
+INCOMPLETE = 'the solver couldn\'t decide the condition.'
+
+
+class PathSolver:
+    """
+    an incremental solver holding the path conditions of a single explored path.
+
+    conds: the path conditions, as a persistent linked list of (cond, rest, length) tuples, newest first. forks
+        share the list, so forking a path doesn't copy any condition.
+    scope_marks: a stack of list lengths, one for each open scope. the visitor pushes a scope when it enters a block
+        whose conditions shouldn't outlive it (a loop body or an inlined function call), and pops it on exit.
+    solver: the underlying z3 solver, with one z3 scope per entry in scope_marks, so that lemmas learned while
+        checking one branch are kept for its siblings. it is only built on the first query, which keeps forking a
+        path cheap when the fork never needs to check anything.
+    theories: the theories the solver was built for, see get_theories. it is configured for the narrowest logic
+        covering them (see LOGICS), so that linear and purely boolean queries get z3's specialised procedures, and
+        is built again for a wider logic when a condition or query needs other theories.
+    index: maps the id of every constant in the path conditions to the positions of the conditions it appears in,
+        oldest first, to slice queries (see get_slice). None until the first query on a condition, and kept up to
+        date by add and pop once it is built. conditions without constants are indexed under None.
+    index_constants: the ids of the constants of each indexed condition, by position.
+    cache: a QueryCache consulted before every query, or None.
+    stats: counters shared by every PathSolver of an analysis. 'queries' counts the queries asked, 'solver_checks'
+        the ones that reached z3, 'sliced' the ones that left out some path conditions, 'reused' the ones satisfied
+        by a witness of the sampler, 'sampled' the ones proven satisfiable by a sample, 'concrete' the ones on python
+        bools that needed none of them, 'unknown' the ones that came back unknown, 'solver_<logic>' the solvers
+        built for each logic, 'portfolio' the ones raced by the portfolio, and 'portfolio_<name>' the ones each of
+        its configurations decided first.
+    hooks: the AnalysisHooks told about every query, or None.
+    sampler: a PathSampler trying its witnesses and samples on nonlinear queries before z3, or None.
+    witness: the latest Witness found satisfying a query on a condition this path has then taken, or None. the
+        values that reached one branch of a path often reach its next one too, so it is tried first (see check).
+    checked: the latest conditions queried and the witnesses found satisfying them, see found.
+    budget: the Budget limiting the queries that reach z3, or None.
+    portfolio: the SolverPortfolio racing the queries z3 doesn't decide within its first attempt, or None.
+    undecided: maps the line of every node a query came back unknown for to the reason, or None. shared by every
+        PathSolver of an analysis.
+    """
+
+    MEMORY_STATISTICS = {'memory', 'max memory'}
+
+    def __init__(self, conds=None, scope_marks=None, cache=None, stats=None, hooks=None, sampler=None, budget=None,
+                 undecided=None, portfolio=None):
+        self.conds = conds
+        self.scope_marks: list[int] = [] if scope_marks is None else scope_marks
+        self.solver = None
+        self.theories = 0
+        self.index: dict[int | None, list[int]] | None = None
+        self.index_constants: list[tuple[int, ...]] = []
+        self.cache: QueryCache | None = cache
+        self.stats: Counter = Counter() if stats is None else stats
+        self.hooks = hooks
+        self.sampler: PathSampler | None = sampler
+        self.witness: Witness | None = None
+        self.checked: list[tuple[BoolRef, Witness]] = []
+        self.budget: Budget | None = budget
+        self.undecided: dict[int, str] | None = undecided
+        self.portfolio: SolverPortfolio | None = portfolio
+        self.last_statistics: dict[str, float] = {}
+
+    def __len__(self):
+        return len_of(self.conds)
+
+    def __iter__(self):
+        return iter(self.as_list())
+
+    def add(self, cond):
+        if cond is True:
+            return
+        elif cond is False:
+            cond = BoolVal(False)
+
+        self.conds = (cond, self.conds, len(self) + 1)
+
+        for checked, witness in self.checked:
+            if checked is cond:
+                self.witness = witness
+        self.checked = []
+
+        if self.solver is not None and self.covers(cond):
+            self.solver.add(cond)
+        else:
+            self.solver = None
+
+        if self.index is not None:
+            self.index_cond(cond)
+
+    def push(self):
+        self.scope_marks.append(len(self))
+
+        if self.solver is not None:
+            self.solver.push()
+
+    def pop(self):
+        mark = self.scope_marks.pop()
+        while len(self) > mark:
+            self.conds = self.conds[1]
+
+        if self.solver is not None:
+            self.solver.pop()
+
+        while self.index is not None and len(self.index_constants) > len(self):
+            for const in self.index_constants.pop() or [None]:
+                self.index[const].pop()
+
+    def check(self, cond=None, node=None):
+        """
+        returns whether the path conditions, and cond if given, are satisfiable. node is the ast node the query is
+        made for, passed on to the hooks.
+
+        a query on cond only includes the path conditions in its cone of influence (see get_slice), so it is smaller
+        and more likely to be found in the cache. those conditions are checked by a solver of their own when the
+        slice leaves any out. a query without cond, on whether the path itself is feasible, includes all of them.
+
+        a nonlinear query is first evaluated on the witness of the path and the witnesses of the sampler, the models
+        of the latest satisfiable queries, then on sampled values, and is satisfiable if any of them satisfies it.
+        z3's linear solvers answer a query faster than these can be evaluated, so linear ones go to z3. the model of
+        every query z3 finds satisfiable becomes a witness.
+
+        a concrete cond, a python bool, is its own answer: the path it is checked on has been found feasible already.
+
+        a query z3 can't decide within the limits of the budget, or asked once the budget has run out, comes back
+        unknown, and the line of node is recorded in undecided. the visitor takes it as satisfiable, so that no line
+        is reported unreachable without a proof. with a portfolio, a query z3 doesn't decide at once is raced by
+        several configurations instead (see check_solver).
+        """
+        if isinstance(cond, bool):
+            self.stats['concrete'] += 1
+            return sat if cond else unsat
+
+        self.stats['queries'] += 1
+        start = time.perf_counter()
+
+        conds = self.as_list()
+        sliced = conds if cond is None else self.get_slice(conds, cond)
+        query = sliced + ([] if cond is None else [cond])
+
+        if len(sliced) < len(conds):
+            self.stats['sliced'] += 1
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(query)
+
+        if key is not None:
+            result = self.cache.get(key)
+            if result is not None:
+                if self.hooks is not None:
+                    self.hooks.on_check(node, result, time.perf_counter() - start, 'cache', {})
+                return result
+
+        nonlinear = self.sampler is not None and self.get_theories(query) & NONLINEAR
+
+        witness = self.sampler.reuse(query, self.witness) if nonlinear else None
+        if witness is not None:
+            self.stats['reused'] += 1
+            self.found(cond, witness)
+
+            if key is not None:
+                self.cache.put(key, sat)
+            if self.hooks is not None:
+                self.hooks.on_check(node, sat, time.perf_counter() - start, 'witness', {})
+            return sat
+
+        witness = self.sampler.sample(query) if nonlinear else None
+        if witness is not None:
+            self.stats['sampled'] += 1
+            self.found(cond, witness)
+
+            if key is not None:
+                self.cache.put(key, sat)
+            if self.hooks is not None:
+                self.hooks.on_check(node, sat, time.perf_counter() - start, 'sample', {})
+            return sat
+
+        if self.budget is not None and self.budget.spent():
+            self.stats['unknown'] += 1
+            self.undecide(node, SPENT)
+
+            if self.hooks is not None:
+                self.hooks.on_check(node, unknown, time.perf_counter() - start, 'budget', {})
+            return unknown
+
+        self.stats['solver_checks'] += 1
+
+        if len(sliced) < len(conds):
+            solver = self.new_solver(self.get_theories(query))
+            solver.add(*query)
+            result = self.check_solver(solver, query, cond, node)
+            last_statistics = None
+        else:
+            if cond is not None and self.solver is not None and not self.covers(cond):
+                self.solver = None
+
+            solver = self.get_solver([] if cond is None else [cond])
+
+            solver.push()
+            if cond is not None:
+                solver.add(cond)
+            result = self.check_solver(solver, query, cond, node)
+            solver.pop()
+
+            last_statistics = self.last_statistics
+
+        if key is not None and result != unknown:
+            self.cache.put(key, result)
+
+        if self.hooks is not None:
+            self.hooks.on_check(node, result, time.perf_counter() - start, 'solver',
+                                get_statistics(solver, last_statistics))
+
+        return result
+
+    def check_solver(self, solver, query, cond, node):
+        """
+        returns the result of z3 on query, held by solver, within the limits of the budget. the model of a sat query
+        becomes a witness, and the reason of an unknown one is recorded.
+
+        with a portfolio, solver only gets a short first attempt, and a query it doesn't decide within it is raced
+        by the portfolio for the rest of its time.
+        """
+        start = time.perf_counter()
+
+        timeout = None
+        if self.budget is not None:
+            self.budget.configure(solver)
+            timeout = self.budget.get_timeout()
+
+        first_attempt = self.portfolio is not None and self.portfolio.configure(solver, timeout)
+
+        result = solver.check()
+        reason = solver.reason_unknown() if result == unknown else None
+
+        elapsed = time.perf_counter() - start
+        if first_attempt and reason in ('timeout', 'canceled') and elapsed >= self.portfolio.first_attempt:
+            result = self.race(query, elapsed)
+            reason = 'timeout'
+
+        if result == sat and self.sampler is not None and reason is None:
+            self.found(cond, self.sampler.add_model(solver.model()))
+        elif result == unknown:
+            self.stats['unknown'] += 1
+            self.undecide(node, LIMITED if reason in ('timeout', 'canceled') or 'limit' in reason else INCOMPLETE)
+
+        return result
+
+    def race(self, query, elapsed):
+        """
+        returns the result of the portfolio on query, which has been checked for elapsed seconds already.
+        """
+        timeout = rlimit = None
+        if self.budget is not None:
+            timeout = self.budget.get_timeout(elapsed)
+            rlimit = self.budget.query_rlimit
+
+        self.stats['portfolio'] += 1
+        result, name = self.portfolio.race(query, LOGICS.get(self.get_theories(query)), timeout, rlimit)
+        if name is not None:
+            self.stats['portfolio_' + name] += 1
+
+        return result
+
+    def undecide(self, node, reason):
+        if self.undecided is not None and node is not None and hasattr(node, 'lineno'):
+            self.undecided.setdefault(node.lineno, reason)
+
+    def found(self, cond, witness):
+        """
+        records the witness found satisfying a query on cond, which becomes the witness of the path if cond is the
+        next condition added to it. a branch checks both of its conditions before adding one to each side.
+        """
+        if cond is not None and witness is not None:
+            self.checked = self.checked[-1:] + [(cond, witness)]
+
+    def get_slice(self, conds, cond):
+        """
+        returns the path conditions in the cone of influence of cond, oldest first: those sharing a constant with
+        cond, or with another condition in the cone, along with the conditions without constants. the others
+        constrain unrelated constants, so they can't make cond unsatisfiable unless the path itself is infeasible.
+        """
+        if self.index is None:
+            self.index = {}
+            self.index_constants = []
+            for c in conds:
+                self.index_cond(c)
+
+        picked = set(self.index.get(None, []))
+        pending = list(self.get_constants(cond))
+        seen = set(pending)
+
+        while pending:
+            for position in self.index.get(pending.pop(), []):
+                if position in picked:
+                    continue
+
+                picked.add(position)
+                for const in self.index_constants[position]:
+                    if const not in seen:
+                        seen.add(const)
+                        pending.append(const)
+
+        return [conds[position] for position in sorted(picked)]
+
+    def index_cond(self, cond):
+        constants = self.get_constants(cond)
+        position = len(self.index_constants)
+        self.index_constants.append(constants)
+
+        for const in constants or [None]:
+            self.index.setdefault(const, []).append(position)
+
+    def get_constants(self, cond):
+        if self.cache is None:
+            return get_constant_ids(cond, {})
+        return self.cache.get_constants(cond)
+
+    def fork(self):
+        solver = PathSolver(self.conds, self.scope_marks.copy(), self.cache, self.stats, self.hooks, self.sampler,
+                            self.budget, self.undecided, self.portfolio)
+        solver.witness = self.witness
+        solver.checked = self.checked
+        return solver
+
+    def split(self, other):
+        """
+        returns the conditions this solver shares with another (as a list node, see conds), and the conditions each
+        of them has on top of those, oldest first. forks share the conditions added before they were made.
+        """
+        own, others = [], []
+        node, other_node = self.conds, other.conds
+
+        while len_of(node) > len_of(other_node):
+            own.append(node[0])
+            node = node[1]
+
+        while len_of(other_node) > len_of(node):
+            others.append(other_node[0])
+            other_node = other_node[1]
+
+        while node is not other_node:
+            own.append(node[0])
+            node = node[1]
+            others.append(other_node[0])
+            other_node = other_node[1]
+
+        own.reverse()
+        others.reverse()
+        return node, own, others
+
+    def as_list(self):
+        """
+        returns the path conditions, oldest first.
+        """
+        ret = []
+        node = self.conds
+        while node is not None:
+            ret.append(node[0])
+            node = node[1]
+
+        ret.reverse()
+        return ret
+
+    def covers(self, cond):
+        return self.get_theories([cond]) | self.theories == self.theories
+
+    def get_theories(self, conds):
+        ret = 0
+        for cond in conds:
+            ret |= get_theories(cond) if self.cache is None else self.cache.memoize(self.cache.theories, cond,
+                                                                                     get_theories)
+
+        return ret
+
+    def new_solver(self, theories):
+        logic = LOGICS.get(theories)
+        self.stats['solver_' + (logic or 'default')] += 1
+
+        return Solver() if logic is None else SolverFor(logic)
+
+    def get_solver(self, queried=()):
+        """
+        returns the z3 solver, building it for the theories of the path conditions and the queried conditions if
+        needed.
+        """
+        if self.solver is None:
+            self.theories = self.get_theories(self.as_list() + list(queried))
+            self.solver = self.new_solver(self.theories)
+            self.last_statistics = {}
+
+            marks = self.scope_marks.copy()
+            marks.reverse()
+
+            for i, cond in enumerate(self.as_list()):
+                while marks and marks[-1] == i:
+                    self.solver.push()
+                    marks.pop()
+                self.solver.add(cond)
+
+            for _ in marks:
+                self.solver.push()
+
+        return self.solver
+
+
+class QueryCache:
+    """
+    an LRU cache of satisfiability results, shared by every PathSolver of an analysis, so that a query asked again
+    (by a sibling function, a duplicated elif test, or a forked path) never reaches z3 twice.
+
+    queries are keyed by a canonical form of the checked conjunction: each condition is simplified and split into
+    its conjuncts, the conjuncts are sorted, and the symbolic constants are renamed in order of appearance, so that
+    the same query over differently numbered variables has the same key.
+
+    queries with a term of more than MAX_TERM_SIZE distinct subterms aren't cached, since their canonical form is
+    printed as a tree and can be exponentially larger than the term (the path conditions of paths joined by
+    UnreachablePathVisitor.subsume share their subterms).
+
+    size: the maximum number of results kept.
+    hits, misses: the number of queries answered from the cache, and not.
+    """
+
+    MAX_TERM_SIZE = 64
+
+    def __init__(self, size=4096):
+        self.size = size
+        self.results: OrderedDict[str, CheckSatResult] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # conjuncts of each condition, see get_conjuncts, keyed by its id. the condition is kept with them so its id
+        # can't be reused by another term while it is in here.
+        self.conjuncts: dict[int, tuple[BoolRef, list[tuple[str, list[ExprRef]]]]] = {}
+
+        # theories of each condition, see PathSolver, kept the same way
+        self.theories: dict[int, tuple[BoolRef, int]] = {}
+
+        # ids of the constants of every subterm of the conditions sliced by PathSolver, see get_constant_ids
+        self.constants: dict[int, tuple[ExprRef, frozenset[int]]] = {}
+
+    def get(self, key):
+        result = self.results.get(key)
+
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.results.move_to_end(key)
+
+        return result
+
+    def put(self, key, result):
+        self.results[key] = result
+        self.results.move_to_end(key)
+
+        while len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def key(self, conds):
+        """
+        returns the key of the conjunction of conds, or None if it is too large to be cached.
+        """
+        terms = []
+        for cond in conds:
+            conjuncts = self.get_conjuncts(cond)
+            if conjuncts is None:
+                return None
+            terms.extend(conjuncts)
+
+        if any(shape == 'false' for shape, _ in terms):
+            return 'false'
+
+        # terms are sorted by their shape, which doesn't depend on the names of constants, so the constants are
+        # numbered in a stable order
+        terms.sort(key=lambda term: term[0])
+
+        numbers = {}
+        parts = []
+        for shape, consts in terms:
+            indices = []
+            for const in consts:
+                if const.get_id() not in numbers:
+                    numbers[const.get_id()] = len(numbers)
+                indices.append(str(numbers[const.get_id()]))
+
+            parts.append(shape + ' ' + ','.join(indices))
+
+        parts = sorted(set(parts))
+        return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+    def memoize(self, table, cond, compute):
+        """
+        returns compute(cond), kept in table under the id of cond like conjuncts. the table is cleared when it holds
+        more than size conditions.
+        """
+        entry = table.get(cond.get_id())
+
+        if entry is None:
+            if len(table) > self.size:
+                table.clear()
+
+            entry = (cond, compute(cond))
+            table[cond.get_id()] = entry
+
+        return entry[1]
+
+    def get_constants(self, cond):
+        if len(self.constants) > self.size * 16:
+            self.constants.clear()
+
+        return get_constant_ids(cond, self.constants)
+
+    def get_conjuncts(self, cond):
+        """
+        returns the conjuncts of cond after simplification, each as a pair of its shape and its constants. the shape
+        is its s-expression with its constants renamed in order of appearance, so it only depends on its structure.
+        returns None if a conjunct has more than MAX_TERM_SIZE subterms.
+        """
+        entry = self.conjuncts.get(cond.get_id())
+
+        if entry is None:
+            if len(self.conjuncts) > self.size:
+                self.conjuncts.clear()
+
+            simplified = simplify(cond)
+            conjuncts = simplified.children() if is_and(simplified) else [simplified]
+            shapes = [get_shape(c, self.MAX_TERM_SIZE) for c in conjuncts if not is_true(c)]
+            entry = (cond, None if None in shapes else shapes)
+            self.conjuncts[cond.get_id()] = entry
+
+        return entry[1]
+
+
+def get_theories(cond):
+    """
+    returns the theories used by a condition, as a combination of INT, REAL and NONLINEAR. conditions are classified
+    one at a time, since a goal holding a false condition is trivially propositional.
+    """
+    goal = Goal()
+    goal.add(cond)
+
+    for name, theories in THEORY_PROBES:
+        if Probe(name)(goal):
+            return theories
+
+    return INT | REAL | NONLINEAR
+
+
+def get_statistics(solver, last=None):
+    """
+    returns z3's statistics for a solver: how much each counter grew since they were last recorded in last, and the
+    memory figures as they are. without last, the counters are returned as they are.
+    """
+    statistics = solver.statistics()
+    ret = {}
+
+    for key in statistics.keys():
+        value = statistics.get_key_value(key)
+        if key in PathSolver.MEMORY_STATISTICS or last is None:
+            ret[key] = value
+        else:
+            ret[key] = value - last.get(key, 0)
+            last[key] = value
+
+    return ret
+
+
+def get_constant_ids(expr, table):
+    """
+    returns the ids of the uninterpreted constants of expr. the constants of every subterm are kept in table, with
+    the subterm, so that conditions built from the same subterms (such as the joined conditions of
+    UnreachablePathVisitor.subsume) are only walked once.
+    """
+    stack = [(expr, None)]
+
+    while stack:
+        e, children = stack.pop()
+        if e.get_id() in table:
+            continue
+
+        if is_const(e):
+            table[e.get_id()] = (e, frozenset([e.get_id()] if e.decl().kind() == Z3_OP_UNINTERPRETED else []))
+        elif children is None:
+            children = e.children()
+            stack.append((e, children))
+            stack.extend((c, None) for c in children if c.get_id() not in table)
+        else:
+            table[e.get_id()] = (e, frozenset().union(*[table[c.get_id()][1] for c in children]))
+
+    return table[expr.get_id()][1]
+
+
+def len_of(conds):
+    return 0 if conds is None else conds[2]
+
+
+def get_constants(expr, limit=None):
+    """
+    returns the uninterpreted constants of expr, in order of first appearance, or None if it has more than limit
+    distinct subterms.
+    """
+    ret = []
+    seen = set()
+    stack = [expr]
+
+    while stack:
+        e = stack.pop()
+        if e.get_id() in seen:
+            continue
+        seen.add(e.get_id())
+
+        if limit is not None and len(seen) > limit:
+            return None
+
+        if is_const(e) and e.decl().kind() == Z3_OP_UNINTERPRETED:
+            ret.append(e)
+        else:
+            stack.extend(reversed(e.children()))
+
+    return ret
+
+
+def get_shape(expr, limit=None):
+    """
+    returns the s-expression of expr with its uninterpreted constants renamed in order of first appearance, and the
+    constants in that order. returns None if expr has more than limit distinct subterms.
+    """
+    consts = get_constants(expr, limit)
+    if consts is None:
+        return None
+    if len(consts) == 0:
+        return expr.sexpr(), consts
+
+    renamed = substitute(expr, *[(c, Const('k!' + str(i), c.sort())) for i, c in enumerate(consts)])
+    return renamed.sexpr(), consts
@@ -1,25 +1,128 @@
 import ast
+import math
+import multiprocessing
+import operator
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from z3 import *
+from limits import AnalysisTimeout, Budget, time_limit
+from path_portfolio import SolverPortfolio
+from path_sampler import PathSampler
+from path_scheduler import PathScheduler
+from path_solver import PathSolver, QueryCache, len_of
+from result_cache import ResultCache, function_key
+
+# the reasons a line is reported as unreachable, see UnreachablePathVisitor.mark
+AFTER_EXIT = 'every path returns, raises or leaves the loop before it.'
+NEVER_ENTERED = 'the loop condition is always false.'
+NEVER_LEFT = 'the loop never ends through its condition, so its else block never runs.'
+EMPTY_RANGE = 'the range is always empty.'
+NOT_INT_RANGE = 'the range is never given ints, so it raises.'
+UNSUPPORTED_LOOP = 'the loop iterates over something other than a range, which isn\'t supported.'
+
+# the binary operations evaluated by python when both operands are concrete, see evaluate
+CONCRETE_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+                      ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow}
+MAX_CONCRETE_EXPONENT = 1024
+
+# the binary operators whose result is an int when both operands are
+INTEGRAL_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.FloorDiv, ast.Mod)
 
 
 class UnreachablePathVisitor(ast.NodeVisitor):
     """
-    variables_stack: a stack of dictionaries mapping variable names to its symbolic representation. each stack
-        represents a scope. the symbolic representation may be a boolean or an arithmetic expression.
+    variables_stack: a stack of ScopeMaps mapping variable names to its symbolic representation. each stack
+        represents a scope. the symbolic representation may be a boolean or an arithmetic expression, or a python
+        number or bool while the value is concrete (see is_concrete).
     functions_stack: a stack of dictionaries mapping function names to ast.FunctionDef nodes, used for traversing
-        function calls. similarly to above, each stack represents a scope.
-    path_conds: a stack of expressions representing path conditions.
+        function calls. similarly to above, each stack represents a scope. a dictionary is never modified once its
+        functions are collected, so forked visitors share them.
+    solver: the path conditions of this path, kept as z3 terms built at each branch point inside an incremental
+        solver (see PathSolver).
 
     output: a set of line numbers that are deemed unreachable.
 
     whileloop_break_detector_stack: stack used for tracking if a reachable break exists inside a while loop.
     line_after_while_block: used to track the line no. of line right after a while block.
+
+    merge: if True, the two branches of an if statement are joined back into a single state after the if, instead of
+        spawning a visitor per path. see visit_merged_branches.
+    strategy: the order the paths of a function are walked in when they aren't merged, see PathScheduler.
+    max_states: the number of paths of a function walked at once, beyond which branches are merged, or None.
+    scheduler: the PathScheduler of the function body being walked, shared by every path through it, or None.
+    frames: the blocks this path is walking, outermost first, each as a pair of the block and the index of the
+        statement after the one being walked in it. a path forked inside them goes on from there, see PathScheduler.
+    returned: whether this path has returned, after which the scheduler stops walking it.
+    furthest_line: the last line of a statement walked on this path.
+    skipped: the lines this path can't reach since it took the other branch of an if statement, or returned before
+        them. the lines reported on other paths are kept when this path skips them, see PathScheduler.finish.
+
+    summaries: a cache of FunctionSummary objects keyed by function node and argument sorts, shared by every visitor
+        of an analysis. None marks a summary that is being built, so recursive calls are left unsupported.
+    return_cases: if not None, every normal exit of the function being summarised is recorded here as a pair of the
+        path conditions and the returned value.
+    unroll: if greater than 0, while and for loops are unrolled for at most that many iterations, see
+        visit_unrolled_loop. otherwise, only whether a loop can be entered and left is checked.
+    widen: if True, while loops are walked once for any number of iterations instead, see visit_widened_loop.
+    loop_stack: a LoopFrame for each unrolled loop being walked, innermost last.
+    reached: while an unrolled loop is being walked, the lines of the statements walked in it. None otherwise.
+
+    function_workers: if greater than 1, the top-level functions of a module are analysed in that many worker
+        processes. see visit_functions_parallel.
+    function_timeout: the time limit for analysing each top-level function in a worker, in seconds.
+    errors: maps the names of top-level functions whose analysis failed in a worker to an error message.
+
+    cache_dir: if not None, the unreachable lines of each top-level function are kept in a ResultCache under this
+        directory, and functions whose cache key hasn't changed since a previous run aren't analysed again.
+    query_cache: a QueryCache of satisfiability results shared by every visitor of an analysis, holding at most
+        query_cache_size results. None if query_cache_size is 0.
+    sampler: a PathSampler shared by every visitor of an analysis, evaluating nonlinear queries on the latest models
+        found (at most witnesses of them, kept for each function) and on samples values before z3. None if samples
+        and witnesses are 0.
+    budget: a Budget shared by every visitor of an analysis, limiting each query to query_timeout seconds and
+        query_rlimit of z3's resources, and the queries of each top-level function and of the file to
+        function_budget and file_budget seconds. None if there are no limits.
+    portfolio: a SolverPortfolio shared by every visitor of an analysis, racing that many solver configurations on
+        the queries z3 doesn't decide within portfolio_after seconds. None if portfolio is 0.
+    undecided: maps every line whose branches a query came back unknown for to the reason, see PathSolver.check.
+        an unreachable line may be missed there, but is never reported by mistake.
+    stats: counters shared by every visitor of an analysis: the 'queries' and 'solver_checks' of PathSolver, the
+        number of 'forks', and the number of paths 'subsumed' by another one.
+    hooks: an AnalysisHooks instance told about solver queries, forks, calls, loops and the functions
+        analysed, or None.
+    reasons: maps every line reported as unreachable by a visitor of an analysis to the reason it was reported for.
     """
 
-    def __init__(self, parent=None):
-        self.variables_stack: list[dict[str, ArithRef | BoolRef]] = [{}]
-        self.functions_stack = [{}]
-        self.path_conds: list[ast.expr] = []
+    def __init__(self, parent=None, merge=False, function_workers=1, function_timeout=None, cache_dir=None,
+                 query_cache_size=4096, hooks=None, unroll=0, widen=False, strategy='bfs', max_states=None,
+                 samples=16, witnesses=8, query_timeout=None, query_rlimit=None, function_budget=None,
+                 file_budget=None, portfolio=0, portfolio_after=0.25):
+        if parent is not None:
+            self.query_cache = parent.query_cache
+            self.sampler = parent.sampler
+            self.budget = parent.budget
+            self.portfolio = parent.portfolio
+            self.stats = parent.stats
+            self.hooks = parent.hooks
+            self.reasons = parent.reasons
+            self.undecided = parent.undecided
+        else:
+            limits = (query_timeout, query_rlimit, function_budget, file_budget)
+            self.query_cache = QueryCache(query_cache_size) if query_cache_size > 0 else None
+            self.sampler = PathSampler(samples, witnesses) if samples > 0 or witnesses > 0 else None
+            self.budget = Budget(*limits) if any(limit is not None for limit in limits) else None
+            self.portfolio = SolverPortfolio(portfolio, portfolio_after) if portfolio > 0 else None
+            self.stats = Counter()
+            self.hooks = hooks
+            self.reasons: dict[int, str] = {}
+            self.undecided: dict[int, str] = {}
+
+        self.variables_stack: list[ScopeMap] = [ScopeMap()]
+        self.functions_stack: list[dict[str, ast.FunctionDef]] = [{}]
+        self.solver = PathSolver(cache=self.query_cache, stats=self.stats, hooks=self.hooks, sampler=self.sampler,
+                                 budget=self.budget, undecided=self.undecided, portfolio=self.portfolio)
 
         self.output: set[int] = set()
         self.whileloop_break_detector_stack = []
@@ -27,7 +130,14 @@ class UnreachablePathVisitor(ast.NodeVisitor):
 
         self.child_visitors = []
         self.parent = parent
-        if parent is not None:
+        self.scheduler: PathScheduler | None = None if parent is None else parent.scheduler
+        self.frames: list[tuple[list[ast.stmt], int]] = [] if parent is None else parent.frames.copy()
+        self.returned = False
+        self.furthest_line = 0 if parent is None else parent.furthest_line
+        self.skipped: set[int] = set() if parent is None else parent.skipped.copy()
+        if self.scheduler is not None:
+            self.scheduler.spawn(self)
+        elif parent is not None:
             parent.child_visitors.append(self)
 
         self.symbol_prefix = 'var'
@@ -36,22 +146,207 @@ class UnreachablePathVisitor(ast.NodeVisitor):
         self.return_flag = object()
         self.return_val = None
 
+        self.merge = merge if parent is None else parent.merge
+        self.strategy = strategy if parent is None else parent.strategy
+        self.max_states = max_states if parent is None else parent.max_states
+
+        self.summaries: dict[tuple, FunctionSummary | None] = {} if parent is None else parent.summaries
+        self.return_cases: list[tuple[list[BoolRef], ExprRef | None]] | None = None
+
+        self.unroll = unroll if parent is None else parent.unroll
+        self.widen = widen if parent is None else parent.widen
+        self.loop_stack: list[LoopFrame] = []
+        self.reached: set[int] | None = None
+
+        self.function_workers = function_workers
+        self.function_timeout = function_timeout
+        self.errors: dict[str, str] = {}
+
+        self.cache_dir = cache_dir
+        self.result_cache: ResultCache | None = None
+
+    def visit(self, node):
+        if isinstance(node, ast.stmt):
+            self.furthest_line = max(self.furthest_line, node.lineno)
+            if self.reached is not None:
+                self.reached.add(node.lineno)
+
+        if self.hooks is None or not isinstance(node, (ast.While, ast.For)):
+            return super().visit(node)
+
+        start = time.perf_counter()
+        ret = super().visit(node)
+        self.hooks.on_loop(node, time.perf_counter() - start)
+
+        return ret
+
     """
     Root
     """
 
     def visit_Module(self, node):
+        for _ in self.iter_findings(node):
+            pass
+
+        return self.collect_output()
+
+    def iter_findings(self, node, path=None):
+        """
+        analyses a module, yielding a Finding for each unreachable line as soon as the top-level function (or
+        module-level statement) containing it has been analysed. the visitors of a function are dropped once it is
+        done, so memory doesn't grow with the number of functions. path is the file the module was read from, if any.
+        """
         self.collect_functions(node.body)
 
-        for stmt in node.body:
+        if self.cache_dir is not None:
+            self.result_cache = ResultCache(self.cache_dir)
+
+        try:
+            if self.function_workers > 1:
+                results = self.visit_functions_parallel(node.body)
+            else:
+                results = ((stmt, self.visit_module_stmt(stmt, node.body[:i])) for i, stmt in enumerate(node.body))
+
+            for stmt, lines in results:
+                function = stmt.name if isinstance(stmt, ast.FunctionDef) else None
+                for line in sorted(lines):
+                    yield Finding(path, function, line, lines[line])
+        finally:
+            if self.result_cache is not None:
+                self.result_cache.close()
+                self.result_cache = None
+
+    def visit_module_stmt(self, stmt, body_before=()):
+        """
+        analyses a module-level statement, and returns its unreachable lines mapped to their reasons.
+        """
+        if not isinstance(stmt, ast.FunctionDef):
+            output = self.output.copy()
+            self.visit(stmt)
+            return self.get_findings(self.output - output)
+
+        key = self.function_cache_key(stmt, body_before)
+        if key is not None:
+            lines = self.load_cached_function(stmt, key)
+            if lines is not None:
+                return lines
+
+        undecided = len(self.undecided)
+        if self.budget is not None:
+            self.budget.start_function()
+
+        try:
+            child = self.fork(stmt)
+            child.visit(stmt)
+        finally:
+            if self.budget is not None:
+                self.budget.end_function()
+
+        # the function is done, so only its output is kept
+        self.child_visitors.remove(child)
+        lines = self.get_findings(child.output)
+        self.output |= lines.keys()
+
+        # the lines of a function with undecided queries may be found unreachable with more time
+        if key is not None and len(self.undecided) == undecided:
+            self.result_cache.put(key, stmt.lineno, lines)
+
+        return lines
+
+    def visit_functions_parallel(self, body):
+        """
+        analyses each top-level function in a worker process, yielding each module-level statement with its
+        unreachable lines (see visit_module_stmt) as it is done. a worker is sent the function's node, the
+        module-level statements before it (to rebuild the bindings it sees) and, once per worker, the module's
+        function table.
+
+        a function whose analysis raises or times out is recorded in self.errors. if a worker process dies, the pool
+        is lost along with every function still in it, so those functions are retried in a process of their own.
+        """
+        tasks = []
+        for i, stmt in enumerate(body):
             if isinstance(stmt, ast.FunctionDef):
-                child = UnreachablePathVisitor(self)
-                child.variables_stack = copy.deepcopy(self.variables_stack)
-                child.functions_stack = copy.deepcopy(self.functions_stack)
-                child.visit(stmt)
+                key = self.function_cache_key(stmt, body[:i])
+                lines = None if key is None else self.load_cached_function(stmt, key)
+
+                if lines is None:
+                    tasks.append((stmt, get_prelude(body[:i]), key))
+                else:
+                    yield stmt, lines
             else:
-                self.visit(stmt)
+                yield stmt, self.visit_module_stmt(stmt)
 
+        if len(tasks) == 0:
+            return
+
+        options = self.get_options() | self.get_solver_options()
+        crashed = []
+        yield from self.run_function_tasks(tasks, self.function_workers, options, crashed)
+
+        for task in crashed:
+            lost = []
+            yield from self.run_function_tasks([task], 1, options, lost)
+
+            if lost:
+                self.errors[task[0].name] = 'worker process crashed.'
+
+    def run_function_tasks(self, tasks, workers, options, crashed):
+        """
+        runs tasks in a pool of worker processes, yielding each function with its unreachable lines as it is done.
+        the tasks lost to a crashed worker are appended to crashed.
+        """
+        context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context,
+                                       initializer=init_function_worker,
+                                       initargs=(self.functions_stack[-1], options))
+
+        with executor:
+            worker_hooks = None if self.hooks is None else self.hooks.worker_hooks()
+            futures = {}
+            for task in tasks:
+                stmt, prelude, _ = task
+                futures[executor.submit(analyze_function, stmt, prelude, self.function_timeout, worker_hooks)] = task
+
+            for future in as_completed(futures):
+                task = futures[future]
+                stmt, _, key = task
+
+                try:
+                    lines, undecided, error, hooks = future.result()
+                except BrokenProcessPool:
+                    crashed.append(task)
+                    continue
+
+                if hooks is not None:
+                    self.hooks.merge_worker(hooks)
+
+                self.output |= lines.keys()
+                self.reasons.update((line, reason) for line, reason in lines.items() if line not in self.reasons)
+                self.undecided.update((line, reason) for line, reason in undecided.items()
+                                      if line not in self.undecided)
+
+                if error is not None:
+                    self.errors[stmt.name] = error
+                elif key is not None and len(undecided) == 0:
+                    self.result_cache.put(key, stmt.lineno, lines)
+
+                yield stmt, lines
+
+    def function_cache_key(self, stmt, body_before):
+        if self.result_cache is None:
+            return None
+
+        return function_key(stmt, self.functions_stack[-1], get_prelude(body_before), self.get_options())
+
+    def load_cached_function(self, stmt, key):
+        lines = self.result_cache.get(key, stmt.lineno)
+        if lines is None:
+            return None
+
+        self.output |= lines.keys()
+        return lines
+
+    def collect_output(self):
         final_output = set()
         for visitor in [self] + self.child_visitors:
             final_output = final_output.union(visitor.output)
@@ -61,40 +356,66 @@ class UnreachablePathVisitor(ast.NodeVisitor):
 
         return ret
 
+    def mark(self, line, reason):
+        """
+        reports a line as unreachable on this visitor's path. the first reason given for a line is kept.
+        """
+        self.output.add(line)
+
+        if line not in self.reasons:
+            self.reasons[line] = reason
+
+    def get_findings(self, lines):
+        """
+        returns the given unreachable lines mapped to their reasons.
+        """
+        return {line: self.reasons.get(line, 'unreachable.') for line in lines}
+
     """
     Definitions
     """
 
     def visit_FunctionDef(self, node):
+        if self.hooks is not None:
+            self.hooks.on_enter(node)
+
         self.new_scope()
         self.collect_functions(node.body)
 
+        int_params = get_int_params(node)
         for arg in node.args.args:
             name = arg.arg
-            self.variables()[name] = self.new_symbolic_var()
+            self.set_variable(name, self.new_symbolic_var(IntSort() if name in int_params else RealSort()))
 
+        # every path forked while walking the body, however deeply, is queued on the scheduler and walks the rest of
+        # the blocks around its fork on its own
         body = node.body
-        for i, stmt in enumerate(body):
-            curr_visitors = self.child_visitors.copy()
+        outer_scheduler = self.scheduler
+        outer_path = self.frames, self.returned, self.furthest_line, self.skipped
+        self.scheduler = PathScheduler(body, self.strategy, self.max_states)
 
-            for visitor in [self] + curr_visitors:
-                ret = visitor.visit(stmt)
+        # the models of another function's queries are about other variables, so each function has its own witnesses
+        sampler = self.sampler
+        if sampler is not None:
+            outer_witnesses = sampler.witnesses
+            sampler.witnesses = deque(maxlen=outer_witnesses.maxlen)
 
-                if ret == visitor.return_flag:
-                    if stmt.lineno < body[-1].lineno:
-                        visitor.output.add(body[i + 1].lineno)
+        def step(visitor, stmt):
+            if visitor.visit(stmt) == visitor.return_flag:
+                visitor.leave_blocks()
 
-            # newly spawned visitors should have an identical output to the parent visitor
-            for v_i in range(len(curr_visitors), len(self.child_visitors)):
-                child = self.child_visitors[v_i]
-                child.output = child.parent.output.copy()
+        self.output = self.scheduler.run(self, step)
+        self.scheduler = outer_scheduler
+        self.frames, self.returned, self.furthest_line, self.skipped = outer_path
 
-        for visitor in self.child_visitors:
-            self.output &= visitor.output
+        if sampler is not None:
+            sampler.witnesses = outer_witnesses
 
-        # self.visit_until_return(node.body)
         self.teardown_scope()
 
+        if self.hooks is not None:
+            self.hooks.on_exit(node)
+
     """
     Literals and variable names
     """
@@ -103,11 +424,12 @@ class UnreachablePathVisitor(ast.NodeVisitor):
         return self.variables()[node.id]
 
     def visit_Constant(self, node):
+        if is_concrete(node.value):
+            # kept as a python value until it meets a symbolic one, see evaluate
+            return node.value
+
         try:
-            if isinstance(node.value, bool):
-                return BoolVal(node.value)
-            else:
-                return RealVal(float(node.value))
+            return RealVal(float(node.value))
         except ValueError:
             # unsupported value
             return None
@@ -125,17 +447,25 @@ class UnreachablePathVisitor(ast.NodeVisitor):
         if func is None:
             return
 
+        start = time.perf_counter()
         args = [self.visit(arg) for arg in node.args]
 
-        self.new_scope()
+        summarised = (func, self.get_summary_key(args)) not in self.summaries
+        summary = self.get_summary(func, args)
 
-        for i, param in enumerate(func.args.args):
-            self.variables()[param.arg] = args[i]
+        if self.hooks is not None:
+            self.hooks.on_call(node, func, summarised, time.perf_counter() - start)
 
-        self.visit_until_return(func.body)
-        self.teardown_scope()
+        if summary is None:
+            # a recursive call, made while its function is being summarised: it may return any value
+            return FreshConst(RealSort(), self.symbol_prefix)
+
+        return_val, exit_cond = summary.instantiate(args)
+        if exit_cond is not None and not is_true(exit_cond):
+            # the code after the call only runs if the function returned
+            self.solver.add(exit_cond)
 
-        return self.return_val
+        return return_val
 
     def visit_UnaryOp(self, node):
         op = node.op
@@ -147,7 +477,7 @@ class UnreachablePathVisitor(ast.NodeVisitor):
             case ast.UAdd:
                 return +value
             case ast.Not:
-                return Not(value)
+                return (not value) if is_concrete(value) else Not(value)
             case _:
                 # unsupported operations
                 return None
@@ -156,6 +486,14 @@ class UnreachablePathVisitor(ast.NodeVisitor):
         left, right = self.visit(node.left), self.visit(node.right)
         op = node.op
 
+        if is_concrete(left) and is_concrete(right):
+            value = evaluate(op, left, right)
+            if value is not None:
+                return value
+
+            # left to z3, e.g. a division by zero
+            left, right = to_z3(left), to_z3(right)
+
         match type(op):
             case ast.Add:
                 return left + right
@@ -164,7 +502,12 @@ class UnreachablePathVisitor(ast.NodeVisitor):
             case ast.Mult:
                 return left * right
             case ast.Div:
-                return left / right
+                # true division, even of two ints
+                return to_real(left) / to_real(right)
+            case ast.FloorDiv:
+                return floor_div(left, right)
+            case ast.Mod:
+                return left - right * floor_div(left, right)
             case ast.Pow:
                 return left ** right
             case _:
@@ -175,6 +518,13 @@ class UnreachablePathVisitor(ast.NodeVisitor):
         op = node.op
         values = [self.visit(n) for n in node.values]
 
+        if all(is_concrete(value) for value in values):
+            # python returns the first operand that decides the result
+            for value in values[:-1]:
+                if bool(value) == isinstance(op, ast.Or):
+                    return value
+            return values[-1]
+
         match type(op):
             case ast.Or:
                 return Or(*values)
@@ -183,6 +533,10 @@ class UnreachablePathVisitor(ast.NodeVisitor):
 
     def visit_Compare(self, node):
         comparators = [self.visit(comparator) for comparator in [node.left] + node.comparators]
+        concrete = all(is_concrete(comparator) for comparator in comparators)
+        if not concrete:
+            comparators = [to_z3(comparator) for comparator in comparators]
+
         eqs = []
 
         for i in range(len(comparators) - 1):  # len(comparators) == len(node.ops) + 1
@@ -207,6 +561,9 @@ class UnreachablePathVisitor(ast.NodeVisitor):
                     # unsupported operations
                     pass
 
+        if concrete:
+            return all(eqs)
+
         return simplify(And(*eqs))
 
     """
@@ -218,15 +575,23 @@ class UnreachablePathVisitor(ast.NodeVisitor):
 
         for target in node.targets:
             if isinstance(target, ast.Name):
-                self.variables()[target.id] = rhs
+                self.set_variable(target.id, rhs)
 
     def visit_AugAssign(self, node):
-        # TODO
-        self.generic_visit(node)
+        if not isinstance(node.target, ast.Name):
+            # unsupported
+            return
+
+        value = ast.BinOp(left=ast.Name(id=node.target.id, ctx=ast.Load()), op=node.op, right=node.value)
+        self.set_variable(node.target.id, self.visit_BinOp(value))
 
     def visit_Return(self, node):
         if node.value:
             self.return_val = self.visit(node.value)
+
+        if self.return_cases is not None:
+            self.return_cases.append((self.solver.as_list(), self.return_val if node.value else None))
+
         return self.return_flag
 
     def visit_Raise(self, node):
@@ -244,36 +609,39 @@ class UnreachablePathVisitor(ast.NodeVisitor):
         if_returned = False
         else_returned = False
 
-        if_cond = self.visit(test)
-        if isinstance(if_cond, ArithRef):
-            if_cond = if_cond > 0
+        if_cond = get_cond(self.visit(test))
+        else_cond = negate(if_cond)
 
-        else_cond = simplify(Not(if_cond))
+        if_unreachable = self.solver.check(if_cond, node) == unsat
+        else_unreachable = self.solver.check(else_cond, node) == unsat
 
-        solver = Solver()
-        for cond in self.path_conds:
-            solver.add(self.visit(cond))
+        if self.merge and not if_unreachable and not else_unreachable:
+            return self.visit_merged_branches(node, if_cond, else_cond)
 
-        solver.push()
-        solver.add(if_cond)
-        if_unreachable = solver.check() == unsat
+        if self.scheduler is not None and self.scheduler.full() and not if_unreachable and not else_unreachable:
+            return self.visit_merged_branches(node, if_cond, else_cond)
 
-        solver.pop()
-        solver.add(else_cond)
-        else_unreachable = solver.check() == unsat
+        if self.budget is not None and self.budget.spent() and not if_unreachable and not else_unreachable:
+            # the paths forked now would only get unknown answers, so the rest of the function is walked at once
+            return self.visit_merged_branches(node, if_cond, else_cond)
 
-        # save copies for the else-block's visitor
-        else_visitor_variables = copy.deepcopy(self.variables_stack)
-        else_visitor_functions = copy.deepcopy(self.functions_stack)
-        else_visitor_path_conds = copy.deepcopy(self.path_conds)
-        else_visitor_symbol_idx = self.symbol_idx
+        if not if_unreachable and not else_unreachable:
+            # spawn a copy of this visitor to traverse the else branch
+            else_visitor = self.fork(node)
+            self.skip(else_block)
+            else_visitor.skip(if_block)
+        else:
+            # use this visitor to traverse whichever branch is reachable
+            else_visitor = self
 
         if if_unreachable:
             # no solution, if branch unreachable
+            if_returned = True
+
             first_line = if_block[0]
-            self.output.add(first_line.lineno)
+            self.mark(first_line.lineno, 'the condition is always false.')
         else:
-            self.path_conds.append(self.return_as_path_cond(test, True))
+            self.solver.add(if_cond)
             if_returned = self.visit_until_return(if_block)
 
         if else_unreachable:
@@ -284,168 +652,1011 @@ class UnreachablePathVisitor(ast.NodeVisitor):
                 first_line = else_block[0]
                 if isinstance(first_line, ast.If):
                     # elif present
-                    self.output.add(first_line.lineno + 1)
+                    self.mark(first_line.lineno + 1, 'a previous condition is always true.')
                 else:
-                    self.output.add(first_line.lineno)
+                    self.mark(first_line.lineno, 'the condition is always true.')
         else:
-            if if_unreachable:
-                # use this visitor to traverse the else branch
-                else_visitor = self
-            else:
-                # spawn a copy of this visitor to traverse the else branch
-                else_visitor = UnreachablePathVisitor(self)
-                else_visitor.variables_stack = else_visitor_variables
-                else_visitor.functions_stack = else_visitor_functions
-                else_visitor.path_conds = else_visitor_path_conds
+            if else_visitor is not self:
                 else_visitor.output = self.output.copy()
-                else_visitor.symbol_idx = else_visitor_symbol_idx
 
-            else_visitor.path_conds.append(self.return_as_path_cond(test, False))
+            else_visitor.solver.add(else_cond)
             else_returned = else_visitor.visit_until_return(else_block)
 
             output_union = self.output.union(else_visitor.output)
             self.output = output_union
             else_visitor.output = output_union.copy()
 
+        if else_visitor is not self:
+            # each path returns on its own
+            if else_returned:
+                else_visitor.leave_blocks()
+            if if_returned:
+                return self.return_flag
+        elif if_returned and else_returned:
+            return self.return_flag
+
+    def visit_merged_branches(self, node, if_cond, else_cond):
+        """
+        traverses both branches of an if statement with this visitor, one after the other, then joins the resulting
+        states: variables bound differently by the two branches get conditional (ite) values, and the path conditions
+        gained inside the branches are joined into a disjunction. a branch that returned is dropped from the join.
+        """
+        saved_variables = [scope.fork() for scope in self.variables_stack]
+        saved_return_val = self.return_val
+        branches = []
+
+        for cond, block in [(if_cond, node.body), (else_cond, node.orelse)]:
+            self.variables_stack = [scope.fork() for scope in saved_variables]
+            self.return_val = saved_return_val
+            start = len(self.solver)
+
+            self.solver.push()
+            self.solver.add(cond)
+            returned = self.visit_until_return(block)
+            conds = self.solver.as_list()[start:]
+            self.solver.pop()
+
+            branches.append((returned, self.variables_stack, conds, self.return_val))
+
+        if_returned, if_variables, if_conds, if_return_val = branches[0]
+        else_returned, else_variables, else_conds, else_return_val = branches[1]
+
         if if_returned and else_returned:
+            self.return_val = self.join_values(if_cond, if_return_val, else_return_val)
             return self.return_flag
 
+        if if_returned:
+            self.variables_stack = else_variables
+            self.return_val = else_return_val
+            conds = else_conds
+        elif else_returned:
+            self.variables_stack = if_variables
+            self.return_val = if_return_val
+            conds = if_conds
+        else:
+            self.variables_stack = [self.join_scopes(if_cond, if_scope, else_scope)
+                                    for if_scope, else_scope in zip(if_variables, else_variables)]
+            self.return_val = self.join_values(if_cond, if_return_val, else_return_val)
+
+            if len(if_conds) == 1 and len(else_conds) == 1:
+                # the branches only differ by their own test, which doesn't constrain the joined path
+                conds = []
+            else:
+                conds = [simplify(Or(And(*if_conds), And(*else_conds)))]
+
+        for cond in conds:
+            self.solver.add(cond)
+
     def visit_For(self, node):
         for_block = node.body
 
-        if not isinstance(node.iter, ast.Call) or node.iter.func.id != "range":
-            print("Warning: Unsupported for-loop iterable encountered.")
+        func = node.iter.func if isinstance(node.iter, ast.Call) else None
+        if not isinstance(func, ast.Name) or func.id != "range":
+            # the body is skipped, so whether its lines are reached is left undecided
+            self.undecided.setdefault(node.lineno, UNSUPPORTED_LOOP)
             return
 
+        if isinstance(node.target, ast.Name) and 1 <= len(node.iter.args) <= 3:
+            if not self.enter_range(node):
+                return self.return_flag
+            if self.unroll > 0:
+                return self.visit_unrolled_for(node)
+            return self.visit_range_loop(node)
+
         # case 1: check if we can enter for-loop.
         lhs = self.visit(node.iter.args[0])
         rhs = self.visit(node.iter.args[1])
 
-        solver = Solver()
-        for cond in self.path_conds:
-            solver.add(self.visit(cond))
-
-        solver.push()
-        solver.add(rhs > lhs)
-
-        if solver.check() == unsat:
+        if self.solver.check(rhs > lhs, node) == unsat:
             # no solution, loop body unreachable.
             first_line = for_block[0]
-            self.output.add(first_line.lineno)
+            self.mark(first_line.lineno, EMPTY_RANGE)
 
     def visit_While(self, node):
+        if self.widen:
+            return self.visit_widened_loop(node, lambda: self.visit(node.test))
+        elif self.unroll > 0:
+            return self.visit_unrolled_loop(node, lambda: self.visit(node.test))
+
         while_block = node.body
         else_block = node.orelse
 
         # used to check if we can ENTER loop
-        if_cond = self.visit(node.test)
-        if isinstance(if_cond, ArithRef):
-            if_cond = if_cond > 0
+        if_cond = get_cond(self.visit(node.test))
 
         # used for checking if we can EXIT loop
-        else_cond = simplify(Not(if_cond))
-
-        solver = Solver()
-        for cond in self.path_conds:
-            solver.add(self.visit(cond))
+        else_cond = negate(if_cond)
 
-        solver.push()
-        solver.add(if_cond)
-
-        if solver.check() == unsat:
+        if self.solver.check(if_cond, node) == unsat:
             # while loop body unreachable.
             first_line = while_block[0]
-            self.output.add(first_line.lineno)
+            self.mark(first_line.lineno, NEVER_ENTERED)
         else:
             # while loop body reachable.
-            solver.pop()
-            solver.add(else_cond)
-
-            if solver.check() == unsat:
+            if self.solver.check(else_cond, node) == unsat:
                 # case where cond is always true, and we can't leave without a reachable break.
 
                 if len(else_block) == 1:
                     # else block exists and is unreachable.
                     first_line = else_block[0]
-                    self.output.add(first_line.lineno)
+                    self.mark(first_line.lineno, NEVER_LEFT)
 
                 self.whileloop_break_detector_stack.append(False)
 
+                # conditions of branches inside the body only hold within the loop, and so do the paths through it
+                merge = self.merge
+                self.merge = True
+                self.solver.push()
+                self.solver.add(if_cond)
+
                 for line in while_block:
                     self.visit(line)
 
+                self.solver.pop()
+                self.merge = merge
+
                 if not self.whileloop_break_detector_stack.pop():
                     # all code after while_loop body is unreachable.
-                    self.output.add(node.end_lineno + 1)
+                    self.mark(node.end_lineno + 1, 'the loop before it never ends.')
 
     def visit_Break(self, node):
+        if len(self.loop_stack) > 0:
+            if self.solver.check(node=node) != unsat:
+                frame = self.loop_stack[-1]
+                frame.breaks.append(self.get_state(frame.start))
+
+            # the rest of this path leaves the loop
+            return self.return_flag
+
         if len(self.whileloop_break_detector_stack) == 0:
             return
 
-        solver = Solver()
-        for cond in self.path_conds:
-            solver.add(self.visit(cond))
-
-        solver.push()
-        if solver.check() == sat:
+        if self.solver.check(node=node) != unsat:
             # this break is reachable, update the stack.
             self.whileloop_break_detector_stack.pop()
             self.whileloop_break_detector_stack.append(True)
 
+    def visit_Continue(self, node):
+        if len(self.loop_stack) == 0:
+            return
+
+        if self.solver.check(node=node) != unsat:
+            frame = self.loop_stack[-1]
+            frame.continues.append(self.get_state(frame.iteration_start))
+
+        # the rest of this path goes on with the next iteration
+        return self.return_flag
+
+    def visit_unrolled_for(self, node):
+        lower, upper, step = self.get_range(node)
+
+        # the next value of the range, kept under a name no python variable can have
+        counter = f'range.{node.lineno}.{node.col_offset}'
+        self.set_variable(counter, lower)
+
+        def test():
+            return self.in_range(self.variables()[counter], upper, step)
+
+        def begin():
+            value = self.variables()[counter]
+            self.set_variable(node.target.id, value)
+            self.set_variable(counter, value + step)
+
+        return self.visit_unrolled_loop(node, test, begin, [counter])
+
+    def visit_range_loop(self, node):
+        """
+        walks a loop over a range once, for a symbolic iteration k of a symbolic number of iterations n, so that its
+        cost doesn't depend on the length of the range. the loop target is bound to its value in iteration k, and so
+        are the variables updated by get_inductions, which have closed forms. the other variables assigned in the
+        loop are havocked and constrained by infer_invariants, as in visit_widened_loop.
+
+        the loop is left through its end with the values of iteration n, or through a reachable break.
+        """
+        lower, upper, step = self.get_range(node)
+        merge = self.merge
+        self.merge = True
+
+        frame = LoopFrame(len(self.solver))
+
+        if self.solver.check(self.in_range(lower, upper, step), node) == unsat:
+            # the range is empty
+            self.mark(node.body[0].lineno, EMPTY_RANGE)
+            frame.exits.append(self.get_state(frame.start))
+
+            ret = self.leave_loop(node, frame)
+            self.merge = merge
+            return ret
+
+        # the number of iterations, the first one whose value is out of the range
+        count = FreshConst(IntSort(), 'range')
+        self.solver.add(count >= 0)
+        self.solver.add(Not(self.in_range(lower + step * count, upper, step)))
+        self.solver.add(Or(count == 0, self.in_range(lower + step * (count - 1), upper, step)))
+
+        targets = self.get_loop_targets(node)
+        inductions = self.get_inductions(node, targets)
+        others = [name for name in targets if name not in inductions and name != node.target.id]
+
+        def bind(iteration):
+            # binds the loop target and the inductions for the start of an iteration
+            k = iteration
+            self.set_variable(node.target.id, lower + step * k)
+
+            for name, (sign, initial, increment) in inductions.items():
+                if increment is None:
+                    # incremented by the loop target: the sum of the values of the range before iteration k
+                    total = lower * k + step * k * (k - 1) / 2
+                else:
+                    total = increment * k
+                self.set_variable(name, initial + sign * total)
+
+        iteration = FreshConst(IntSort(), 'iteration')
+        cond = And(iteration >= 0, iteration < count)
+        invariants = self.infer_invariants(node, lambda: cond, lambda: bind(iteration), others)
+
+        self.loop_stack.append(frame)
+        self.solver.push()
+
+        outer_reached = self.reached
+        self.reached = set()
+
+        self.havoc(others, node)
+        for invariant in invariants:
+            self.solver.add(invariant())
+
+        # the state after the last iteration
+        target = self.variables().get(node.target.id)
+        saved = [scope.fork() for scope in self.variables_stack]
+        bind(count)
+        self.set_variable(node.target.id, self.join_values(count > 0, lower + step * (count - 1), target))
+        exit_state = self.get_state(frame.start)
+        self.variables_stack = saved
+
+        found, ended = self.visit_iteration(node.body, cond, lambda: bind(iteration), frame)
+        self.output |= found - self.reached
+
+        self.solver.pop()
+        self.loop_stack.pop()
+
+        if outer_reached is not None:
+            outer_reached |= self.reached
+        self.reached = outer_reached
+
+        exit_conds = exit_state[0]
+        if ended:
+            # every iteration leaves the loop, so only an empty range gets to its end
+            exit_conds = exit_conds + [count == 0]
+
+        if self.solver.check(And(*exit_conds), node) != unsat:
+            frame.exits.append((exit_conds,) + exit_state[1:])
+
+        ret = self.leave_loop(node, frame)
+        self.merge = merge
+
+        return ret
+
+    def visit_unrolled_loop(self, node, test, begin=None, counters=()):
+        """
+        walks a loop iteration by iteration on this visitor, then continues from the join of every state in which the
+        loop is left. branches inside the loop are joined as in merging mode, so each iteration starts from a single
+        state, and each iteration's conditions are added to the same incremental solver as the previous ones.
+
+        the loop is unrolled for at most self.unroll iterations. while the loop's test can fail, which makes the
+        number of iterations depend on the path, it also stops after an iteration that reached no new line. if the
+        loop can still go on, the variables it assigns are havocked (given fresh values) and the body is walked once
+        more, which covers every later iteration. a line of the body found unreachable is only reported if no walk
+        reached it.
+
+        test: returns the loop's test under the current state.
+        begin: if not None, called at the start of each iteration, e.g. to bind the target of a for loop.
+        counters: names of variables updated by begin, havocked along with the loop's own assignments.
+        """
+        merge = self.merge
+        self.merge = True
+
+        frame = LoopFrame(len(self.solver))
+        self.loop_stack.append(frame)
+        self.solver.push()
+
+        outer_reached = self.reached
+        self.reached = set()
+
+        unreachable = set()
+        entered = False
+        havocked = False
+        iterations = 0
+
+        while True:
+            reached = len(self.reached)
+
+            cond = self.get_loop_test(test)
+            exit_cond = negate(cond)
+
+            can_exit = self.solver.check(exit_cond, node) != unsat
+            if can_exit:
+                frame.exits.append(self.get_state(frame.start, [exit_cond]))
+
+            if self.solver.check(cond, node) == unsat:
+                break
+
+            entered = True
+            found, ended = self.visit_iteration(node.body, cond, begin, frame)
+            unreachable |= found
+            iterations += 1
+
+            if ended or havocked:
+                break
+
+            if iterations >= self.unroll or (can_exit and len(self.reached) == reached):
+                self.havoc(self.get_loop_targets(node) + list(counters), node)
+                havocked = True
+
+        self.solver.pop()
+        self.loop_stack.pop()
+
+        if not entered:
+            self.mark(node.body[0].lineno, NEVER_ENTERED)
+        else:
+            self.output |= unreachable - self.reached
+
+        if outer_reached is not None:
+            outer_reached |= self.reached
+        self.reached = outer_reached
+
+        ret = self.leave_loop(node, frame)
+        self.merge = merge
+
+        return ret
+
+    def visit_widened_loop(self, node, test, begin=None, counters=()):
+        """
+        walks a loop once, from a state standing for the start of any of its iterations, so that its cost doesn't
+        depend on the number of iterations. the variables assigned in the loop are havocked (given fresh values),
+        then constrained by the invariants found by infer_invariants. branches inside the loop are joined as in
+        merging mode.
+
+        test, begin and counters are as in visit_unrolled_loop.
+        """
+        merge = self.merge
+        self.merge = True
+
+        frame = LoopFrame(len(self.solver))
+        cond = self.get_loop_test(test)
+        exit_cond = negate(cond)
+
+        if self.solver.check(cond, node) == unsat:
+            # the loop is never entered
+            self.mark(node.body[0].lineno, NEVER_ENTERED)
+            frame.exits.append(self.get_state(frame.start, [exit_cond]))
+
+            ret = self.leave_loop(node, frame)
+            self.merge = merge
+            return ret
+
+        targets = self.get_loop_targets(node) + list(counters)
+        invariants = self.infer_invariants(node, test, begin, targets)
+
+        self.loop_stack.append(frame)
+        self.solver.push()
+
+        outer_reached = self.reached
+        self.reached = set()
+
+        self.havoc(targets, node)
+        for invariant in invariants:
+            self.solver.add(invariant())
+
+        cond = self.get_loop_test(test)
+        exit_cond = negate(cond)
+
+        if self.solver.check(exit_cond, node) != unsat:
+            frame.exits.append(self.get_state(frame.start, [exit_cond]))
+
+        if self.solver.check(cond, node) != unsat:
+            found, _ = self.visit_iteration(node.body, cond, begin, frame)
+            self.output |= found - self.reached
+
+        self.solver.pop()
+        self.loop_stack.pop()
+
+        if outer_reached is not None:
+            outer_reached |= self.reached
+        self.reached = outer_reached
+
+        ret = self.leave_loop(node, frame)
+        self.merge = merge
+
+        return ret
+
+    def infer_invariants(self, node, test, begin, targets):
+        """
+        returns invariants of a loop, which hold whenever an iteration starts, as functions returning the invariant
+        under the current state.
+
+        the candidates are that each numeric variable assigned in the loop stays at least, or at most, its value on
+        entry, and, for a while loop with a single comparison, its test with equality allowed (i < n gives i <= n).
+        candidates that don't hold on entry are dropped. then, until none is dropped, an iteration is walked from a
+        havocked state assuming the remaining candidates, and those that may not hold at its end are dropped.
+        """
+        candidates = []
+
+        for name in targets:
+            value = self.variables().get(name)
+            if is_number(value):
+                candidates.append(lambda name=name, value=value: self.variables()[name] >= value)
+                candidates.append(lambda name=name, value=value: self.variables()[name] <= value)
+
+        if isinstance(node, ast.While) and isinstance(node.test, ast.Compare) and len(node.test.ops) == 1:
+            relaxed = {ast.Lt: ast.LtE, ast.Gt: ast.GtE}.get(type(node.test.ops[0]))
+            if relaxed is not None:
+                compare = ast.Compare(left=node.test.left, ops=[relaxed()], comparators=node.test.comparators)
+                candidates.append(lambda: self.visit(compare))
+
+        candidates = [c for c in candidates if self.solver.check(Not(c()), node) == unsat]
+
+        # the walks only test the candidates, so nothing they find is kept
+        saved = [scope.fork() for scope in self.variables_stack], self.return_val, self.return_cases, self.reached
+        self.return_cases = None
+        self.reached = None
+
+        while len(candidates) > 0:
+            self.loop_stack.append(LoopFrame(len(self.solver)))
+            self.solver.push()
+
+            self.havoc(targets, node)
+            for candidate in candidates:
+                self.solver.add(candidate())
+
+            _, ended = self.visit_iteration(node.body, self.get_loop_test(test), begin, self.loop_stack[-1])
+            holding = candidates if ended else [c for c in candidates if self.solver.check(Not(c()), node) == unsat]
+
+            self.solver.pop()
+            self.loop_stack.pop()
+            self.variables_stack = [scope.fork() for scope in saved[0]]
+
+            if len(holding) == len(candidates):
+                break
+            candidates = holding
+
+        self.return_val, self.return_cases, self.reached = saved[1:]
+        return candidates
+
+    def leave_loop(self, node, frame):
+        """
+        continues from the join of the ways out of a loop: its breaks, and the states where its test fails, which go
+        through its else block first. returns the return flag if the loop can't be left.
+        """
+        states = frame.breaks
+        if len(frame.exits) == 0:
+            if len(node.orelse) > 0:
+                self.mark(node.orelse[0].lineno, NEVER_LEFT)
+        elif len(node.orelse) > 0:
+            # the else block only runs when the test fails
+            self.solver.push()
+            self.join_states(frame.exits)
+
+            if not self.visit_until_return(node.orelse):
+                states.append(self.get_state(frame.start))
+
+            self.solver.pop()
+        else:
+            states.extend(frame.exits)
+
+        if len(states) == 0:
+            return self.return_flag
+
+        self.join_states(states)
+
+    def get_range(self, node):
+        """
+        returns the start, stop and step of the range a for loop iterates over. a real argument is converted to an
+        int, which it is on the paths that get to the loop (see enter_range).
+        """
+        args = []
+        for arg in node.iter.args:
+            value = self.visit(arg)
+            args.append(ToInt(value) if isinstance(value, ExprRef) and is_real(value) else value)
+
+        if len(args) == 1:
+            return 0, args[0], 1
+        elif len(args) == 2:
+            return args[0], args[1], 1
+        else:
+            return args[0], args[1], args[2]
+
+    def enter_range(self, node):
+        """
+        adds to the path conditions that the real arguments of the range of a for loop are ints, since range raises
+        otherwise. returns False if they can't be on this path, which then raises at the loop, and marks the lines of
+        the loop.
+        """
+        values = [self.visit(arg) for arg in node.iter.args]
+        conds = [IsInt(value) for value in values if isinstance(value, ExprRef) and is_real(value)]
+
+        if len(conds) > 0 and self.solver.check(And(*conds), node) == unsat:
+            for stmt in ast.walk(ast.Module(body=node.body + node.orelse, type_ignores=[])):
+                if isinstance(stmt, ast.stmt):
+                    self.mark(stmt.lineno, NOT_INT_RANGE)
+            return False
+
+        for cond in conds:
+            self.solver.add(cond)
+        return True
+
+    def in_range(self, value, upper, step):
+        if is_concrete(value) and is_concrete(upper) and is_concrete(step):
+            return step > 0 and value < upper or step < 0 and value > upper
+
+        return Or(And(step > 0, value < upper), And(step < 0, value > upper))
+
+    def get_inductions(self, node, targets):
+        """
+        returns the induction variables of a for loop over a range: the variables whose only assignment in the loop
+        is an increment or decrement, run in every iteration, by a loop-invariant value or by the loop target. they
+        are mapped to a tuple of the sign of the update, their value on entry, and the value of the increment, or
+        None for the loop target.
+        """
+        if any(isinstance(n, ast.Continue) for n in ast.walk(ast.Module(body=node.body, type_ignores=[]))):
+            # a continue could skip an update
+            return {}
+
+        assignments = Counter()
+        for n in ast.walk(ast.Module(body=node.body, type_ignores=[])):
+            if isinstance(n, ast.Assign):
+                assignments.update(t.id for t in n.targets if isinstance(t, ast.Name))
+            elif isinstance(n, (ast.AugAssign, ast.AnnAssign, ast.For)) and isinstance(n.target, ast.Name):
+                assignments[n.target.id] += 1
+
+        inductions = {}
+        for stmt in node.body:
+            match stmt:
+                case ast.AugAssign(target=ast.Name(id=name), op=ast.Add() | ast.Sub() as op, value=increment):
+                    pass
+                case ast.Assign(targets=[ast.Name(id=name)],
+                                value=ast.BinOp(left=ast.Name(id=left), op=ast.Add() | ast.Sub() as op,
+                                                right=increment)) if left == name:
+                    pass
+                case _:
+                    continue
+
+            if assignments[name] != 1 or name == node.target.id or self.variables().get(name) is None:
+                continue
+
+            names = {n.id for n in ast.walk(increment) if isinstance(n, ast.Name)}
+            if isinstance(increment, ast.Name) and increment.id == node.target.id:
+                value = None
+            elif names.isdisjoint(targets):
+                value = self.visit(increment)
+                if not is_number(value):
+                    continue
+            else:
+                continue
+
+            sign = 1 if isinstance(op, ast.Add) else -1
+            inductions[name] = (sign, self.variables()[name], value)
+
+        return inductions
+
+    def get_loop_test(self, test):
+        return get_cond(test())
+
+    def visit_iteration(self, body, cond, begin, frame):
+        """
+        walks one iteration of an unrolled loop and leaves this visitor in the join of the states the iteration can
+        end in. returns the lines found unreachable in the iteration, and whether every path left the loop.
+        """
+        frame.iteration_start = len(self.solver)
+        frame.continues = []
+
+        self.solver.push()
+        self.solver.add(cond)
+
+        output = self.output
+        self.output = set()
+
+        if begin is not None:
+            begin()
+        returned = self.visit_until_return(body)
+
+        found = self.output
+        self.output = output
+
+        states = frame.continues
+        if not returned:
+            states.append(self.get_state(frame.iteration_start))
+
+        self.solver.pop()
+
+        if len(states) > 0:
+            self.join_states(states)
+
+        return found, len(states) == 0
+
     """
     Helpers
     """
 
-    def new_symbolic_var(self):
-        var = Const(self.symbol_prefix + str(self.symbol_idx), RealSort())
+    def new_symbolic_var(self, sort=None):
+        var = Const(self.symbol_prefix + str(self.symbol_idx), RealSort() if sort is None else sort)
         self.symbol_idx += 1
         return var
 
+    def get_state(self, start, conds=()):
+        """
+        returns the current state as a tuple of the path conditions added since the first start ones, followed by
+        conds, the variable scopes and the return value.
+        """
+        return self.solver.as_list()[start:] + list(conds), [scope.fork() for scope in self.variables_stack], \
+            self.return_val
+
+    def join_states(self, states):
+        """
+        continues from any of several states returned by get_state, whose conditions were all gathered from the
+        current path: variables get conditional values, and the path conditions gain the disjunction of the states'.
+        """
+        conds, variables, return_val = states[-1]
+
+        for other_conds, other_variables, other_return_val in reversed(states[:-1]):
+            cond = And(*other_conds)
+            variables = [self.join_scopes(cond, other_scope, scope)
+                         for other_scope, scope in zip(other_variables, variables)]
+            return_val = self.join_values(cond, other_return_val, return_val)
+
+        self.variables_stack = variables
+        self.return_val = return_val
+
+        if len(states) == 1:
+            for cond in conds:
+                self.solver.add(cond)
+        else:
+            self.solver.add(simplify(Or(*[And(*conds) for conds, _, _ in states])))
+
+    def havoc(self, names, loop):
+        """
+        gives each of the variables, assigned in the body of loop, fresh, unconstrained values of the same sort. an
+        int variable is only given an int value if every value the loop assigns to it is an int too (see
+        get_integral_targets), since the loop may make it a float.
+        """
+        integral = self.get_integral_targets(loop, names)
+
+        for name in names:
+            value = self.variables().get(name)
+            sort = RealSort() if value is None else get_sort(value)
+            if sort == IntSort() and name not in integral:
+                sort = RealSort()
+            self.set_variable(name, FreshConst(sort, self.symbol_prefix))
+
+    def get_integral_targets(self, loop, names):
+        """
+        returns the variables among names, assigned in the body of loop, that are ints before the loop and stay ints
+        through any number of iterations: every value the loop assigns to them is built from ints and from those
+        variables with the operators that keep ints ints.
+        """
+        values: dict[str, list[ast.expr | None]] = {}
+
+        def assign(target, value):
+            if isinstance(target, ast.Name):
+                values.setdefault(target.id, []).append(value)
+            elif isinstance(target, (ast.Tuple, ast.List)):
+                for element in target.elts:
+                    assign(element, None)
+
+        for n in [loop] + list(ast.walk(ast.Module(body=loop.body, type_ignores=[]))):
+            match n:
+                case ast.Assign():
+                    for target in n.targets:
+                        assign(target, n.value)
+                case ast.AugAssign():
+                    assign(n.target, ast.BinOp(left=n.target, op=n.op, right=n.value))
+                case ast.AnnAssign() if n.value is not None:
+                    assign(n.target, n.value)
+                case ast.For():
+                    is_range = (isinstance(n.iter, ast.Call) and isinstance(n.iter.func, ast.Name) and
+                                n.iter.func.id == 'range')
+                    assign(n.target, n.iter if is_range else None)
+
+        integral = {name for name in names if is_integral(self.variables().get(name))}
+
+        def is_integral_expr(expr):
+            match expr:
+                case ast.Constant():
+                    return isinstance(expr.value, int)
+                case ast.Name() if expr.id in values:
+                    return expr.id in integral
+                case ast.Name():
+                    return is_integral(self.variables().get(expr.id))
+                case ast.BinOp() if isinstance(expr.op, INTEGRAL_OPERATORS):
+                    return is_integral_expr(expr.left) and is_integral_expr(expr.right)
+                case ast.UnaryOp() if isinstance(expr.op, (ast.USub, ast.UAdd)):
+                    return is_integral_expr(expr.operand)
+                case ast.IfExp():
+                    return is_integral_expr(expr.body) and is_integral_expr(expr.orelse)
+                case ast.Call() if isinstance(expr.func, ast.Name) and expr.func.id == 'range':
+                    return all(is_integral_expr(arg) for arg in expr.args)
+
+            return False
+
+        changed = True
+        while changed:
+            changed = False
+            for name in list(integral):
+                if not all(value is not None and is_integral_expr(value) for value in values.get(name, [])):
+                    integral.discard(name)
+                    changed = True
+
+        return integral
+
+    def get_loop_targets(self, node):
+        """
+        returns the names of the variables assigned in the body of a loop, and the target of a for loop.
+        """
+        names = []
+
+        for n in ast.walk(ast.Module(body=node.body, type_ignores=[])):
+            match n:
+                case ast.Assign():
+                    targets = n.targets
+                case ast.AugAssign() | ast.AnnAssign() | ast.For():
+                    targets = [n.target]
+                case _:
+                    continue
+
+            for target in targets:
+                if isinstance(target, ast.Name) and target.id not in names:
+                    names.append(target.id)
+
+        if isinstance(node, ast.For) and isinstance(node.target, ast.Name) and node.target.id not in names:
+            names.append(node.target.id)
+
+        return names
+
     def visit_until_return(self, block):
         returned = False
+        self.frames.append((block, 0))
 
         for i, stmt in enumerate(block):
+            self.frames[-1] = (block, i + 1)
             ret = self.visit(stmt)
 
             if ret == self.return_flag:
                 returned = True
 
                 if stmt.lineno < block[-1].lineno:
-                    self.output.add(block[i + 1].lineno)
+                    self.mark(block[i + 1].lineno, AFTER_EXIT)
 
                 break
 
+        self.frames.pop()
         return returned
 
-    def return_as_path_cond(self, node, cond):
-        ret = self.visit(node)
-
-        # the return value of ast.parse will be wrapped in an ast.Module node
-        # and an ast.Expr node as such:
-        # Module(
-        #     body=[
-        #         Expr(
-        #             value=<the ast.expr node we want>)],
-        #     ...
-        # )
-        if isinstance(ret, BoolRef):
-            if cond:
-                return node
-            else:
-                return ast.parse('not ' + ast.unparse(node)).body[0].value
-        elif isinstance(ret, ArithRef):
-            if cond:
-                return ast.parse(ast.unparse(node) + ' > 0').body[0].value
-            else:
-                return ast.parse(ast.unparse(node) + ' < 0').body[0].value
+    def leave_blocks(self):
+        """
+        ends this path once it has returned: the statement after the one it returned from in each block it was
+        walking can't be reached on it.
+        """
+        for block, index in self.frames:
+            if index < len(block):
+                self.mark(block[index].lineno, AFTER_EXIT)
+
+        if len(self.frames) > 0:
+            body = self.frames[0][0]
+            self.skipped.update(range(self.furthest_line + 1, body[-1].end_lineno + 1))
+
+        self.frames = []
+        self.returned = True
+
+    def skip(self, block):
+        """
+        records that this path doesn't reach the lines of a block.
+        """
+        if len(block) > 0:
+            self.skipped.update(range(block[0].lineno, block[-1].end_lineno + 1))
+
+    def get_summary(self, func, args):
+        sorts = self.get_summary_key(args)
+        key = (func, sorts)
+
+        if key not in self.summaries:
+            self.summaries[key] = None
+            self.summaries[key] = self.summarize(func, sorts)
+
+        return self.summaries[key]
+
+    def get_summary_key(self, args):
+        return tuple(RealSort() if arg is None else get_sort(arg) for arg in args)
+
+    def summarize(self, func, sorts):
+        """
+        symbolically executes a function once, on fresh constants for its parameters, and returns its summary. the
+        function is walked in merging mode so that all of its paths end up in a single state.
+        """
+        visitor = UnreachablePathVisitor(**self.get_options() | {'merge': True})
+        visitor.share_caches(self)
+        visitor.functions_stack = self.functions_stack + [{}]
+        visitor.return_cases = []
+        visitor.collect_functions(func.body)
+
+        params = []
+        for i, param in enumerate(func.args.args):
+            sort = sorts[i] if i < len(sorts) else RealSort()
+            params.append(FreshConst(sort, func.name + '.' + param.arg))
+            visitor.set_variable(param.arg, params[-1])
+
+        if self.hooks is not None:
+            self.hooks.on_enter(func)
+
+        if not visitor.visit_until_return(func.body):
+            # falls through the end of the body
+            visitor.return_cases.append((visitor.solver.as_list(), None))
+
+        if self.hooks is not None:
+            self.hooks.on_exit(func)
+
+        return_val = None
+        for conds, val in reversed(visitor.return_cases):
+            return_val = val if return_val is None else self.join_values(And(*conds), val, return_val)
+
+        exit_cond = None
+        if not any(isinstance(n, (ast.For, ast.While)) for n in ast.walk(func)):
+            # loops are only approximated, so exits inside them may be missed
+            exit_cond = simplify(Or(*[And(*conds) for conds, _ in visitor.return_cases]))
+
+        return FunctionSummary(params, return_val, exit_cond)
 
     def collect_functions(self, body):
         function_collector = FunctionCollector()
         self.functions_stack[-1] = function_collector.collect(body)
 
+    def get_options(self):
+        """
+        returns the keyword arguments for creating a root visitor that analyses a function the way this one does.
+        """
+        return {'merge': self.merge, 'unroll': self.unroll, 'widen': self.widen, 'strategy': self.strategy,
+                'max_states': self.max_states}
+
+    def get_solver_options(self):
+        """
+        returns the keyword arguments setting up the sampler, the budget and the portfolio the way this visitor's are,
+        with the time left in the file's budget. they aren't part of get_options, the key of the results kept in the
+        ResultCache: the sampler and the portfolio never change the results, and the results of a function are only
+        kept if none of its queries was cut short by the budget.
+        """
+        options = {'samples': 0, 'witnesses': 0}
+        if self.sampler is not None:
+            options = {'samples': self.sampler.samples, 'witnesses': self.sampler.witnesses.maxlen}
+        if self.budget is not None:
+            options |= self.budget.get_options()
+        if self.portfolio is not None:
+            options |= {'portfolio': self.portfolio.processes, 'portfolio_after': self.portfolio.first_attempt}
+        return options
+
+    def share_caches(self, other):
+        """
+        makes this root visitor use the caches of another visitor, for analyses that belong to the same run.
+        """
+        self.summaries = other.summaries
+        self.query_cache = other.query_cache
+        self.sampler = other.sampler
+        self.budget = other.budget
+        self.portfolio = other.portfolio
+        self.stats = other.stats
+        self.hooks = other.hooks
+        self.undecided = other.undecided
+        self.solver.cache = other.query_cache
+        self.solver.sampler = other.sampler
+        self.solver.budget = other.budget
+        self.solver.portfolio = other.portfolio
+        self.solver.stats = other.stats
+        self.solver.hooks = other.hooks
+        self.solver.undecided = other.undecided
+
+    def fork(self, node=None):
+        """
+        returns a child visitor continuing from this visitor's state. all state is shared rather than copied: scopes
+        are persistent, and the child's solver is only built once it is queried. node is the statement the fork is
+        made for, passed on to the hooks.
+        """
+        self.stats['forks'] += 1
+        if self.hooks is not None:
+            self.hooks.on_fork(node)
+
+        child = UnreachablePathVisitor(self)
+        child.variables_stack = [scope.fork() for scope in self.variables_stack]
+        child.functions_stack = self.functions_stack.copy()
+        child.solver = self.solver.fork()
+        child.symbol_idx = self.symbol_idx
+
+        return child
+
+    def get_state_key(self):
+        """
+        returns a key that is equal for paths with the same variable bindings, return value, functions and loop
+        state, so that they can be found in a dictionary. z3 terms are hash-consed, so equal terms have equal ids.
+        """
+        scopes = tuple(tuple(sorted((name, get_value_key(value)) for name, value in scope.items()))
+                       for scope in self.variables_stack)
+        functions = tuple(id(functions) for functions in self.functions_stack)
+
+        return (scopes, get_value_key(self.return_val), functions, tuple(self.whileloop_break_detector_stack),
+                self.line_after_while_block, len(self.loop_stack), self.reached is None)
+
+    def subsume(self, other):
+        """
+        folds the path of another visitor with the same state key into this one, and returns whether it could. the
+        path conditions of the two are joined above the ones they share: if either path's own conditions imply the
+        other's, checked syntactically first and then with the solver, the weaker ones are kept, and otherwise their
+        disjunction is. the lines reported or skipped on both paths are kept.
+        """
+        if self.solver.scope_marks != other.solver.scope_marks:
+            return False
+
+        common, own, others = self.solver.split(other.solver)
+        if any(mark > len_of(common) for mark in self.solver.scope_marks):
+            return False
+
+        own_ids = {cond.get_id() for cond in own}
+        other_ids = {cond.get_id() for cond in others}
+
+        if own_ids <= other_ids or other.solver.check(Not(And(*own))) == unsat:
+            # the other path implies this one
+            pass
+        elif other_ids <= own_ids or self.solver.check(Not(And(*others))) == unsat:
+            self.solver = other.solver
+        else:
+            self.solver = PathSolver(common, self.solver.scope_marks.copy(), self.query_cache, self.stats, self.hooks,
+                                     self.sampler, self.budget, self.undecided, self.portfolio)
+
+            cond = simplify(Or(And(*own), And(*others)))
+            if not is_true(cond):
+                self.solver.add(cond)
+
+        # a line is kept if both paths report it or skip it
+        self.output = ((self.output | other.output) & (self.output | self.skipped)
+                       & (other.output | other.skipped))
+        self.skipped = self.skipped & other.skipped
+        self.furthest_line = max(self.furthest_line, other.furthest_line)
+        self.symbol_idx = max(self.symbol_idx, other.symbol_idx)
+        self.stats['subsumed'] += 1
+
+        return True
+
+    def join_scopes(self, cond, if_scope, else_scope):
+        if if_scope is else_scope:
+            return if_scope
+
+        if_bindings, else_bindings = if_scope.as_dict(), else_scope.as_dict()
+        bindings = {}
+        for name in if_bindings.keys() | else_bindings.keys():
+            bindings[name] = self.join_values(cond, if_bindings.get(name), else_bindings.get(name))
+
+        return ScopeMap(bindings)
+
+    def join_values(self, cond, if_val, else_val):
+        if if_val is None or else_val is None:
+            # only bound on one side, so the other side would fail before reading it
+            return else_val if if_val is None else if_val
+        elif is_concrete(if_val) and is_concrete(else_val) and type(if_val) is type(else_val) and if_val == else_val:
+            return if_val
+
+        if_val, else_val = to_z3(if_val), to_z3(else_val)
+        if if_val is else_val or if_val.eq(else_val):
+            return if_val
+        elif is_arith(if_val) and is_arith(else_val) and if_val.sort() != else_val.sort():
+            # an int and a real, joined like python mixes them
+            return If(cond, to_real(if_val), to_real(else_val))
+        elif if_val.sort() != else_val.sort():
+            # no single term can hold both values
+            return FreshConst(if_val.sort(), self.symbol_prefix)
+
+        return If(cond, if_val, else_val)
+
     def variables(self):
         return self.variables_stack[-1]
 
+    def set_variable(self, name, value):
+        self.variables_stack[-1] = self.variables_stack[-1].set(name, value)
+
     def get_function(self, name):
         for scope in reversed(self.functions_stack):
             if name in scope:
@@ -454,7 +1665,7 @@ class UnreachablePathVisitor(ast.NodeVisitor):
             return None
 
     def new_scope(self):
-        self.variables_stack.append({})
+        self.variables_stack.append(ScopeMap())
         self.functions_stack.append({})
 
     def teardown_scope(self):
@@ -476,6 +1687,314 @@ class FunctionCollector(ast.NodeVisitor):
         self.output[node.name] = node
 
 
+class FunctionSummary:
+    """
+    a summary of a user-defined function, built once and instantiated at every call site.
+
+    params: the symbolic constants standing for the function's parameters.
+    return_val: the symbolic return value, as a case split over the path conditions of each return, or a python
+        value if it is concrete. None if the function doesn't return a supported value.
+    exit_cond: the condition under which the function returns normally instead of raising, or None if it isn't known.
+    """
+
+    def __init__(self, params, return_val, exit_cond):
+        self.params: list[ExprRef] = params
+        self.return_val: ExprRef | bool | int | float | None = return_val
+        self.exit_cond: BoolRef | None = exit_cond
+
+    def instantiate(self, args):
+        pairs = [(param, to_z3(arg)) for param, arg in zip(self.params, args) if arg is not None]
+
+        return_val, exit_cond = self.return_val, self.exit_cond
+        if return_val is not None and not is_concrete(return_val):
+            return_val = simplify(substitute(return_val, *pairs))
+        if exit_cond is not None:
+            exit_cond = simplify(substitute(exit_cond, *pairs))
+
+        return return_val, exit_cond
+
+
+class Finding:
+    """
+    an unreachable line.
+
+    path: the file the line is in, or None if the analysed code wasn't read from a file.
+    function: the name of the top-level function the line is in, or None for module-level code.
+    line: the line number.
+    reason: why the line can't be reached.
+    """
+
+    def __init__(self, path, function, line, reason):
+        self.path: str | None = path
+        self.function: str | None = function
+        self.line: int = line
+        self.reason: str = reason
+
+    def as_dict(self):
+        return {'path': self.path, 'function': self.function, 'line': self.line, 'reason': self.reason}
+
+
+class LoopFrame:
+    """
+    the ways out of an unrolled loop being walked.
+
+    start: the number of path conditions when the loop was entered.
+    iteration_start: the number of path conditions when the current iteration was entered.
+    exits: the state of every way out of the loop through its test, see UnreachablePathVisitor.get_state, with the
+        conditions since start.
+    breaks: the state of every reachable break, with the conditions since start.
+    continues: the state of every reachable continue of the current iteration, with the conditions since
+        iteration_start.
+    """
+
+    def __init__(self, start):
+        self.start: int = start
+        self.iteration_start: int = start
+        self.exits: list[tuple] = []
+        self.breaks: list[tuple] = []
+        self.continues: list[tuple] = []
+
+
+class ScopeMap:
+    """
+    a persistent map from names to values, used for variable scopes.
+
+    bindings: the bindings written to this layer.
+    parent: the layer underneath, holding every binding not found in this one.
+    frozen: whether this layer is shared by more than one visitor. writes to a frozen layer go to a new layer on top
+        of it, so forking a visitor never copies bindings. the layers are flattened into one once they get deeper
+        than MAX_DEPTH, to keep lookups cheap.
+    """
+
+    MAX_DEPTH = 32
+
+    def __init__(self, bindings=None, parent=None):
+        self.bindings = {} if bindings is None else bindings
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.frozen = False
+
+    def __getitem__(self, name):
+        scope = self
+        while scope is not None:
+            if name in scope.bindings:
+                return scope.bindings[name]
+            scope = scope.parent
+
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        try:
+            self[name]
+            return True
+        except KeyError:
+            return False
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def items(self):
+        return self.as_dict().items()
+
+    def as_dict(self):
+        ret = {} if self.parent is None else self.parent.as_dict()
+        ret.update(self.bindings)
+        return ret
+
+    def set(self, name, value):
+        if not self.frozen:
+            self.bindings[name] = value
+            return self
+
+        if self.depth >= self.MAX_DEPTH:
+            bindings = self.as_dict()
+            bindings[name] = value
+            return ScopeMap(bindings)
+
+        return ScopeMap({name: value}, self)
+
+    def fork(self):
+        self.frozen = True
+        return self
+
+
+def get_int_params(func):
+    """
+    returns the parameters of a function that must be ints on every path: those passed to the range of a for loop
+    in the body of the function before any other use of them, and never assigned to. a parameter used before, or
+    passed to a range some paths never reach, stays real, and is only an int on the paths through the range (see
+    enter_range).
+    """
+    assigned = set()
+    for node in ast.walk(func):
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.For)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            assigned.update(t.id for t in targets if isinstance(t, ast.Name))
+
+    ranged = set()
+    used = set()
+    for stmt in func.body:
+        match stmt:
+            case ast.For(iter=ast.Call(func=ast.Name(id='range'), args=args)):
+                ranged.update(arg.id for arg in args if isinstance(arg, ast.Name) and arg.id not in used)
+
+        used.update(node.id for node in ast.walk(stmt) if isinstance(node, ast.Name))
+
+    return {arg.arg for arg in func.args.args} & ranged - assigned
+
+
+def is_concrete(value):
+    """
+    returns whether a value is a concrete python number or bool rather than a z3 term. constants stay concrete
+    through the operations on them (see evaluate), so branches on them are decided without z3.
+    """
+    return isinstance(value, (bool, int, float))
+
+
+def is_number(value):
+    return is_concrete(value) and not isinstance(value, bool) or isinstance(value, ExprRef) and is_arith(value)
+
+
+def is_integral(value):
+    return isinstance(value, int) or isinstance(value, ExprRef) and is_int(value)
+
+
+def to_z3(value):
+    """
+    returns a value as a z3 term, converting a concrete one to a literal of its sort.
+    """
+    if isinstance(value, bool):
+        return BoolVal(value)
+    elif isinstance(value, int):
+        return IntVal(value)
+    elif isinstance(value, float):
+        return RealVal(value)
+
+    return value
+
+
+def get_sort(value):
+    if isinstance(value, bool):
+        return BoolSort()
+    elif isinstance(value, int):
+        return IntSort()
+    elif isinstance(value, float):
+        return RealSort()
+
+    return value.sort()
+
+
+def evaluate(op, left, right):
+    """
+    returns the result of a binary operation on two concrete values, computed by python, or None if it isn't a
+    finite number (a division by zero, an overflow, a complex power) or its exponent is too large to compute.
+    """
+    function = CONCRETE_OPERATORS.get(type(op))
+    if function is None or isinstance(op, ast.Pow) and abs(right) > MAX_CONCRETE_EXPONENT:
+        return None
+
+    try:
+        value = function(left, right)
+    except (ArithmeticError, ValueError):
+        return None
+
+    if not isinstance(value, (int, float)) or isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def get_cond(value):
+    """
+    returns the condition for a branch on a value: a concrete value is tested for truth as python does, and a
+    symbolic number is taken to be true when positive.
+    """
+    if is_concrete(value):
+        return bool(value)
+    elif isinstance(value, ArithRef):
+        return value > 0
+
+    return value
+
+
+def negate(cond):
+    return (not cond) if isinstance(cond, bool) else simplify(Not(cond))
+
+
+def to_real(value):
+    if is_concrete(value):
+        return float(value)
+
+    return ToReal(value) if is_int(value) else value
+
+
+def floor_div(left, right):
+    """
+    returns python's floor division of two numbers, rounding towards negative infinity. z3's integer division rounds
+    towards negative infinity only for positive divisors.
+    """
+    if is_integral(left) and is_integral(right):
+        return If(right > 0, left / right, -left / -right)
+
+    return ToReal(ToInt(to_real(left) / to_real(right)))
+
+
+def get_value_key(value):
+    """
+    returns a hashable key for a variable's value, equal for equal z3 terms.
+    """
+    if value is None:
+        return None
+    if is_concrete(value):
+        return type(value).__name__, value
+    if isinstance(value, AstRef):
+        return value.get_id()
+    return 'object', id(value)
+
+
+def get_prelude(body_before):
+    """
+    returns the module-level statements, other than function definitions, that are analysed before a function.
+    """
+    return [stmt for stmt in body_before if not isinstance(stmt, ast.FunctionDef)]
+
+
+function_worker_visitor: UnreachablePathVisitor | None = None
+
+
+def init_function_worker(functions, options):
+    global function_worker_visitor
+    function_worker_visitor = UnreachablePathVisitor(**options)
+    function_worker_visitor.functions_stack = [functions]
+
+
+def analyze_function(stmt, prelude, timeout, hooks):
+    """
+    analyses a top-level function in a worker process set up by init_function_worker, returning its unreachable
+    lines and its undecided lines mapped to their reasons, an error message or None, and the hooks used (see
+    AnalysisHooks.worker_hooks).
+    """
+    function_worker_visitor.hooks = hooks
+    function_worker_visitor.undecided = {}
+    visitor = UnreachablePathVisitor(**function_worker_visitor.get_options())
+    visitor.share_caches(function_worker_visitor)
+    visitor.functions_stack = function_worker_visitor.functions_stack
+
+    try:
+        with time_limit(timeout):
+            for s in prelude:
+                visitor.visit(s)
+            lines = visitor.visit_module_stmt(stmt)
+    except AnalysisTimeout:
+        return {}, {}, f'analysis timed out after {timeout} seconds.', hooks
+    except Exception as e:
+        return {}, {}, f'analysis failed: {type(e).__name__}: {e}', hooks
+
+    return lines, visitor.undecided, None, hooks
+
+
 if __name__ == "__main__":
     '''
     for manual testing w/ debugger
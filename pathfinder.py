@@ -1,31 +1,477 @@
+import argparse
 import ast
-from path_visitor import UnreachablePathVisitor
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from limits import AnalysisTimeout, time_limit
+from metrics import LineProfiler, MetricsHooks
+from path_visitor import Finding, UnreachablePathVisitor
 
 
-def analyze(path):
+# the exit status of main when a file failed, and when unreachable lines were found with --fail-on-findings
+EXIT_FAILED = 2
+EXIT_FOUND = 1
+
+
+def analyze(path, metrics_path=None, profile_path=None, **options):
+    """
+    analyzes a single file and prints its result. returns the result of analyze_file.
+    """
+    result = analyze_file(path, metrics=metrics_path is not None, profile=profile_path is not None, **options)
+
+    if metrics_path is not None:
+        write_metrics(metrics_path, [result])
+    if profile_path is not None:
+        write_profile(profile_path, [result])
+
+    if result['error'] == 'io':
+        print('Error: couldn\'t read file. Is there a file named code.txt in the root?')
+    elif result['error'] is not None:
+        print(f'Error: {result["error"]}')
+    else:
+        print(describe(result['lines']))
+
+        if result['undecided']:
+            print(describe_undecided(result['undecided']))
+
+        for name, error in result['function_errors'].items():
+            print(f'Error in {name}: {error}')
+
+    return result
+
+
+def analyze_file(path, timeout=None, metrics=False, profile=False, **options):
+    """
+    analyzes a single file, returning a dictionary with its path, the sorted unreachable line numbers, the Finding of
+    each line, the sorted lines whose branches the solver couldn't decide within its limits (see
+    UnreachablePathVisitor.undecided), the time the analysis took in seconds, an error message (or 'io' if the file
+    couldn't be read), and the errors of functions analyzed in worker processes. if timeout is given, the analysis
+    is abandoned after that many seconds. if metrics is set, the dictionary also has the analysis' metrics, see
+    get_metrics, and if profile is set, the LineProfiler of the analysis. options are passed on to
+    UnreachablePathVisitor.
+    """
+    for item in iter_file(path, timeout, metrics, profile, **options):
+        if not isinstance(item, Finding):
+            return item
+
+
+def analyze_chunk(paths, **kwargs):
+    """
+    analyzes a chunk of files in a worker process, returning the result of analyze_file for each.
+    """
+    return [analyze_file(path, **kwargs) for path in paths]
+
+
+def iter_file(path, timeout=None, metrics=False, profile=False, **options):
+    """
+    analyzes a single file like analyze_file, yielding the Finding of each unreachable line as soon as the function
+    containing it has been analyzed, and then the dictionary returned by analyze_file.
+    """
+    result = {'path': path, 'lines': [], 'findings': [], 'undecided': [], 'time': 0.0, 'error': None,
+              'function_errors': {}}
+    start = time.perf_counter()
+    deadline = None if timeout is None else start + timeout
+    visitor = None
+
+    if profile:
+        options['hooks'] = LineProfiler()
+    elif metrics:
+        options['hooks'] = MetricsHooks()
+
     try:
         with open(path, 'r') as file:
-            visitor = UnreachablePathVisitor()
             code = file.read()
 
+        with time_limit(timeout):
             tree = ast.parse(code)
-            output = visitor.visit(tree)
+            visitor = UnreachablePathVisitor(**options)
+            findings = visitor.iter_findings(tree, path)
+
+        while True:
+            # the time limit is only armed while the analysis runs, not while the caller handles a finding
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                raise AnalysisTimeout()
+
+            with time_limit(remaining):
+                finding = next(findings, None)
 
-            if len(output) == 0:
-                print('No unreachable paths found.')
-            else:
-                paths = 'paths' if len(output) > 1 else 'path'
-                lines = 'lines' if len(output) > 1 else 'line'
-                nums = ', '.join(map(str, output))
+            if finding is None:
+                break
 
-                print(f'Unreachable {paths} found at {lines} {nums}.')
+            result['findings'].append(finding)
+            yield finding
+
+        result['undecided'] = sorted(visitor.undecided)
+        result['function_errors'] = visitor.errors
     except IOError:
-        print('Error: couldn\'t read file. Is there a file named code.txt in the root?')
+        result['error'] = 'io'
     except SyntaxError as e:
-        print(f'Error: {e.msg} at line {e.lineno}. Make sure the code contains no compilation errors.')
+        result['error'] = f'{e.msg} at line {e.lineno}. Make sure the code contains no compilation errors.'
+    except AnalysisTimeout:
+        result['error'] = f'analysis timed out after {timeout} seconds.'
     except Exception:
-        print('Error: analysis failed. Make sure the code only contains supported constructs.')
+        result['error'] = 'analysis failed. Make sure the code only contains supported constructs.'
+
+    result['lines'] = sorted({finding.line for finding in result['findings']})
+    result['time'] = time.perf_counter() - start
+
+    if metrics:
+        result['metrics'] = get_metrics(options['hooks'], visitor)
+    if profile:
+        result['profile'] = options['hooks']
+
+    yield result
+
+
+def get_metrics(hooks, visitor):
+    """
+    returns the metrics of an analysis as a json-serializable dictionary: the counts, durations and z3 statistics of
+    MetricsHooks, the visitor's stats, and the hits and misses of its query cache.
+    """
+    ret = hooks.as_dict()
+    ret['stats'] = {}
+    ret['query_cache'] = {'hits': 0, 'misses': 0}
+
+    if visitor is not None:
+        ret['stats'] = dict(visitor.stats)
+
+        if visitor.query_cache is not None:
+            ret['query_cache'] = {'hits': visitor.query_cache.hits, 'misses': visitor.query_cache.misses}
+
+    return ret
+
+
+def total_metrics(results):
+    """
+    returns the metrics of every result added up. like MetricsHooks, memory figures are the largest seen.
+    """
+    total = {}
+
+    for result in results:
+        for section, values in result.get('metrics', {}).items():
+            section_total = total.setdefault(section, {})
+            for key, value in values.items():
+                if key in MetricsHooks.MAXIMUM_STATISTICS:
+                    section_total[key] = max(section_total.get(key, 0), value)
+                else:
+                    section_total[key] = section_total.get(key, 0) + value
+
+    return total
+
+
+def write_metrics(path, results):
+    metrics = {
+        'files': {result['path']: result.get('metrics', {}) for result in results},
+        'total': total_metrics(results),
+    }
+
+    with open(path, 'w') as file:
+        json.dump(metrics, file, indent=2, sort_keys=True)
+
+
+def write_profile(path, results):
+    """
+    prints the costliest lines of each file, and writes the folded stacks of every file to path, each under a root
+    frame named after the file.
+    """
+    with open(path, 'w') as file:
+        for result in results:
+            file.write(result['profile'].format_stacks(result['path']))
+
+    for result in results:
+        print(f'{result["path"]}:')
+        print(result['profile'].format_hotspots())
+
+
+def analyze_files(patterns, workers=None, chunksize=1, timeout=None, metrics=False, profile=False, **options):
+    """
+    analyzes every file matched by patterns (files, directories or globs) and returns the results of analyze_file, in
+    the order of collect_files.
+
+    workers: the number of worker processes. defaults to the number of CPUs, and 1 analyzes in this process.
+    chunksize: the number of files sent to a worker at a time.
+    timeout: the time limit for each file, in seconds.
+    metrics, profile: whether to collect the metrics and the profile of each file, see analyze_file.
+    options: passed on to UnreachablePathVisitor.
+    """
+    items = iter_results(patterns, workers, chunksize, timeout, metrics, profile, **options)
+    results = [item for item in items if not isinstance(item, Finding)]
+
+    # collect_files sorts the paths
+    return sorted(results, key=lambda result: result['path'])
+
+
+def iter_results(patterns, workers=None, chunksize=1, timeout=None, metrics=False, profile=False, **options):
+    """
+    analyzes every file matched by patterns like analyze_files, yielding the Finding of each unreachable line as
+    soon as it is known, and the result of analyze_file for each file once it is done, after its findings. only the
+    results of files not yet yielded are held in memory.
+
+    files analyzed in this process are streamed function by function, in the order of collect_files. files analyzed
+    in worker processes are streamed as a whole, in the order their chunks finish, so a slow file doesn't hold back
+    the files after it.
+    """
+    files = collect_files(patterns)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(files) <= 1:
+        for path in files:
+            yield from iter_file(path, timeout, metrics, profile, **options)
+        return
+
+    # each worker is a fresh process, and so gets its own z3 context
+    context = multiprocessing.get_context('spawn')
+    chunks = [files[i:i + chunksize] for i in range(0, len(files), chunksize)]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(files)), mp_context=context) as executor:
+        # only as_completed holds the futures, and lets go of each once it is yielded
+        futures = as_completed([executor.submit(analyze_chunk, chunk, timeout=timeout, metrics=metrics,
+                                                profile=profile, **options) for chunk in chunks])
+
+        for future in futures:
+            for result in future.result():
+                yield from result['findings']
+                yield result
+
+
+def collect_files(patterns):
+    """
+    expands files, directories and glob patterns into a sorted list of file paths without duplicates. directories
+    are searched recursively for .py files.
+    """
+    files = set()
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.update(glob.glob(os.path.join(pattern, '**', '*.py'), recursive=True))
+        elif os.path.isfile(pattern):
+            files.add(pattern)
+        else:
+            files.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+    return sorted(files)
+
+
+def describe(lines):
+    if len(lines) == 0:
+        return 'No unreachable paths found.'
+
+    paths = 'paths' if len(lines) > 1 else 'path'
+    lines_str = 'lines' if len(lines) > 1 else 'line'
+    nums = ', '.join(map(str, lines))
+
+    return f'Unreachable {paths} found at {lines_str} {nums}.'
+
+
+def describe_undecided(lines):
+    lines_str = 'lines' if len(lines) > 1 else 'line'
+    nums = ', '.join(map(str, lines))
+
+    return f'Undecided: the solver reached its limits on, or doesn\'t support, the branches at {lines_str} {nums}.'
+
+
+# the keys of a file's result written by write_jsonl
+RECORD_KEYS = ['path', 'lines', 'undecided', 'time', 'error', 'function_errors']
+
+
+def write_jsonl(items, file, keep=False):
+    """
+    writes the items of iter_results to file as JSON Lines as they come: a record for each finding, then one for
+    each file with its unreachable lines, undecided lines, time and errors. returns the results of the files if keep
+    is set, or an empty list.
+    """
+    results = []
+
+    for item in items:
+        if isinstance(item, Finding):
+            record = {'type': 'finding'} | item.as_dict()
+        else:
+            record = {'type': 'file'} | {key: item[key] for key in RECORD_KEYS}
+            if keep:
+                results.append(item)
+
+        file.write(json.dumps(record) + '\n')
+        file.flush()
+
+    return results
+
+
+def is_failed(result):
+    """
+    returns whether the analysis of a file, or of any function in it, failed.
+    """
+    return result['error'] is not None or len(result['function_errors']) > 0
+
+
+def count_files(items, counts):
+    """
+    passes the items of iter_results through, counting the files that failed and the files with unreachable lines
+    under the 'failed' and 'found' keys of counts.
+    """
+    for item in items:
+        if not isinstance(item, Finding):
+            counts['failed'] += is_failed(item)
+            counts['found'] += len(item['lines']) > 0
+
+        yield item
+
+
+def get_exit_status(failed, found, fail_on_findings=False):
+    if failed > 0:
+        return EXIT_FAILED
+    elif found > 0 and fail_on_findings:
+        return EXIT_FOUND
+
+    return 0
+
+
+def report(results):
+    """
+    prints a line for each file's result and a summary, and returns the number of files that failed and the number
+    of files with unreachable lines.
+    """
+    failed = 0
+    found = 0
+
+    for result in results:
+        failed += is_failed(result)
+
+        if result['error'] == 'io':
+            print(f'{result["path"]}: Error: couldn\'t read file.')
+        elif result['error'] is not None:
+            print(f'{result["path"]}: Error: {result["error"]}')
+        else:
+            found += len(result['lines']) > 0
+            print(f'{result["path"]}: {describe(result["lines"])}')
+
+            if result['undecided']:
+                print(f'{result["path"]}: {describe_undecided(result["undecided"])}')
+
+        for name, error in result['function_errors'].items():
+            print(f'{result["path"]}: Error in {name}: {error}')
+
+    print(f'{len(results)} files analyzed, {found} with unreachable paths, {failed} failed.')
+    return failed, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detect unreachable paths in Python functions.')
+    parser.add_argument('paths', nargs='*',
+                        help='files, directories or glob patterns to analyze. defaults to code.txt')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--chunksize', type=int, default=1,
+                        help='number of files sent to a worker at a time (default: 1)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='time limit for each file, in seconds')
+    parser.add_argument('--merge', action='store_true',
+                        help='join the states of both branches after each if statement')
+    parser.add_argument('--unroll', type=int, default=0, metavar='K',
+                        help='walk while and for loops for up to K iterations instead of only checking their entry '
+                             'and exit (default: 0)')
+    parser.add_argument('--widen', action='store_true',
+                        help='walk while loops once, for any number of iterations, with the variables they assign '
+                             'made unknown apart from inferred invariants')
+    parser.add_argument('--strategy', choices=['bfs', 'dfs', 'coverage'], default='bfs',
+                        help='the order the paths of a function are walked in: statement by statement on every path '
+                             '(bfs), each path to its end (dfs), or least-walked statements first (coverage)')
+    parser.add_argument('--max-states', type=int, default=None, metavar='N',
+                        help='walk at most N paths of a function at once, merging branches beyond that')
+    parser.add_argument('--samples', type=int, default=16, metavar='N',
+                        help='values tried on each nonlinear query before z3 is called, 0 to always call z3 '
+                             '(default: 16)')
+    parser.add_argument('--witnesses', type=int, default=8, metavar='N',
+                        help='models of the latest satisfiable queries of a function tried on each query before z3 '
+                             'is called, 0 to always call z3 (default: 8)')
+    parser.add_argument('--query-timeout', type=float, default=None, metavar='SECONDS',
+                        help='time limit for each solver query, after which its branches are taken as reachable '
+                             'and reported as undecided')
+    parser.add_argument('--query-rlimit', type=int, default=None, metavar='N',
+                        help='z3 resource limit for each solver query, like --query-timeout but independent of the '
+                             'speed and load of the machine')
+    parser.add_argument('--function-budget', type=float, default=None, metavar='SECONDS',
+                        help='time for each function, after which the rest of the function is walked without the '
+                             'solver and its remaining branches are reported as undecided')
+    parser.add_argument('--file-budget', type=float, default=None, metavar='SECONDS',
+                        help='time for each file, like --function-budget. unlike --timeout, the lines decided '
+                             'before it runs out are still reported')
+    parser.add_argument('--portfolio', type=int, default=0, metavar='N',
+                        help='race N solver configurations, each in a process of its own, on the queries z3 doesn\'t '
+                             'decide within --portfolio-after seconds, 0 to leave them to z3 alone (default: 0)')
+    parser.add_argument('--portfolio-after', type=float, default=0.25, metavar='SECONDS',
+                        help='time z3 is given on a query before it is raced with --portfolio (default: 0.25)')
+    parser.add_argument('--function-workers', type=int, default=1,
+                        help='number of worker processes analyzing the functions of each file (default: 1)')
+    parser.add_argument('--function-timeout', type=float, default=None,
+                        help='time limit for each function analyzed in a worker, in seconds')
+    parser.add_argument('--cache-dir', default=None,
+                        help='directory of a cache of results, reused for functions that haven\'t changed')
+    parser.add_argument('--format', choices=['text', 'jsonl'], default='text',
+                        help='print a summary of each file (text), or a JSON object for each unreachable line and '
+                             'each file as soon as it is known (jsonl)')
+    parser.add_argument('--metrics', default=None, metavar='FILE',
+                        help='write the solver queries, forks, calls, loops and z3 statistics of the analysis to '
+                             'FILE as json')
+    parser.add_argument('--profile', default=None, metavar='FILE',
+                        help='print the lines the analysis spent the most time on, and write the time spent in the '
+                             'solver to FILE as folded stacks for flame graph tools')
+    parser.add_argument('--fail-on-findings', action='store_true',
+                        help=f'exit with status {EXIT_FOUND} when unreachable lines are found. a file that fails to '
+                             f'be analyzed always makes the exit status {EXIT_FAILED}')
+    args = parser.parse_args()
+
+    options = {
+        'merge': args.merge,
+        'unroll': args.unroll,
+        'widen': args.widen,
+        'strategy': args.strategy,
+        'max_states': args.max_states,
+        'samples': args.samples,
+        'witnesses': args.witnesses,
+        'query_timeout': args.query_timeout,
+        'query_rlimit': args.query_rlimit,
+        'function_budget': args.function_budget,
+        'file_budget': args.file_budget,
+        'portfolio': args.portfolio,
+        'portfolio_after': args.portfolio_after,
+        'function_workers': args.function_workers,
+        'function_timeout': args.function_timeout,
+        'cache_dir': args.cache_dir,
+    }
+
+    if args.format == 'jsonl':
+        items = iter_results(args.paths or ['code.txt'], args.workers, args.chunksize, args.timeout,
+                             args.metrics is not None, args.profile is not None, **options)
+        counts = Counter()
+        results = write_jsonl(count_files(items, counts), sys.stdout,
+                              keep=args.metrics is not None or args.profile is not None)
+        failed, found = counts['failed'], counts['found']
+
+        if args.metrics is not None:
+            write_metrics(args.metrics, results)
+        if args.profile is not None:
+            write_profile(args.profile, results)
+    elif len(args.paths) == 0:
+        result = analyze('code.txt', args.metrics, args.profile, timeout=args.timeout, **options)
+        failed, found = int(is_failed(result)), int(len(result['lines']) > 0)
+    else:
+        results = analyze_files(args.paths, args.workers, args.chunksize, args.timeout,
+                                args.metrics is not None, args.profile is not None, **options)
+        failed, found = report(results)
+
+        if args.metrics is not None:
+            write_metrics(args.metrics, results)
+        if args.profile is not None:
+            write_profile(args.profile, results)
+
+    sys.exit(get_exit_status(failed, found, args.fail_on_findings))
 
 
 if __name__ == '__main__':
-    analyze('code.txt')
+    main()
@@ -0,0 +1,111 @@
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+
+
+class ResultCache:
+    """
+    a persistent cache of the unreachable lines found in each function and their reasons, stored in a sqlite database
+    under a cache directory. lines are stored relative to the line of the function definition, so that moving a
+    function around its file doesn't invalidate its entry.
+
+    VERSION is part of every key, and should be bumped whenever a change to the analysis can change its results.
+    """
+
+    VERSION = 8
+    FILE_NAME = 'results.sqlite'
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(os.path.join(directory, self.FILE_NAME), timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, lines TEXT NOT NULL)')
+        self.connection.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, lineno):
+        row = self.connection.execute('SELECT lines FROM results WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {lineno + offset: reason for offset, reason in json.loads(row[0])}
+
+    def put(self, key, lineno, lines):
+        """
+        stores the unreachable lines of a function, mapped to their reasons.
+        """
+        offsets = json.dumps(sorted([line - lineno, reason] for line, reason in lines.items()))
+        self.connection.execute('INSERT OR REPLACE INTO results (key, lines) VALUES (?, ?)', (key, offsets))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+def function_key(func, functions, prelude, options):
+    """
+    returns the cache key of a top-level function: a hash of its normalized source (see node_hash), of every function
+    it transitively reaches through calls, of the module-level statements it is analysed after, and of the analysis
+    options.
+
+    func: the ast.FunctionDef node.
+    functions: the module's function table, mapping names to ast.FunctionDef nodes.
+    prelude: the module-level statements before the function.
+    options: the options of the analysis, as returned by UnreachablePathVisitor.get_options.
+    """
+    digest = hashlib.sha256()
+    digest.update(f'{ResultCache.VERSION}\n{sorted(options.items())}\n'.encode())
+
+    for stmt in prelude:
+        digest.update(node_hash(stmt).encode())
+
+    for name, callee in reachable_functions(func, functions):
+        digest.update(f'{name}:{node_hash(callee)}\n'.encode())
+
+    return digest.hexdigest()
+
+
+def reachable_functions(func, functions):
+    """
+    returns (name, node) pairs for func and every module-level function it transitively calls, sorted by name.
+    functions defined inside a function are already part of its hash, so calls to them aren't followed.
+    """
+    reached = {func.name: func}
+    stack = [func]
+
+    while stack:
+        node = stack.pop()
+        local = {n.name for n in ast.walk(node) if isinstance(n, ast.FunctionDef) and n is not node}
+
+        for call in ast.walk(node):
+            if not isinstance(call, ast.Call) or not isinstance(call.func, ast.Name):
+                continue
+
+            name = call.func.id
+            if name in local or name in reached or name not in functions:
+                continue
+
+            reached[name] = functions[name]
+            stack.append(functions[name])
+
+    return sorted(reached.items(), key=lambda item: item[0])
+
+
+def node_hash(node):
+    """
+    returns a hash of the source of a node, and of the lines of its statements relative to its own first line. the
+    lines found in a function are stored relative to its definition, so they are only valid while every statement
+    keeps its offset, which blank lines and comments inside it change.
+    """
+    dump = ast.dump(node, annotate_fields=False, include_attributes=False)
+    offsets = [(stmt.lineno - node.lineno, stmt.end_lineno - node.lineno) for stmt in ast.walk(node)
+               if isinstance(stmt, ast.stmt)]
+    return hashlib.sha256(f'{dump}\n{offsets}'.encode()).hexdigest()
@@ -0,0 +1,32 @@
+import ast
+import unittest
+from benchmarks.generator import generate_program
+from benchmarks.runner import compare, run_case
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_generated_program_parses(self):
+        code = generate_program(functions=2, depth=3, sequential_ifs=2, elif_chain=3, loop_nesting=2, call_fanout=2)
+        tree = ast.parse(code)
+
+        names = [stmt.name for stmt in tree.body]
+        self.assertListEqual(['helper0', 'helper1', 'example0', 'example1'], names)
+
+    def test_run_case(self):
+        metrics = run_case({'depth': 2, 'options': {'merge': True}}, repeat=1)
+
+        self.assertEqual(1, metrics['unreachable_lines'])
+        self.assertGreater(metrics['solver_checks'], 0)
+        self.assertGreater(metrics['peak_memory'], 0)
+
+    def test_compare(self):
+        old = {'time': 1.0, 'solver_checks': 10, 'forks': 2, 'peak_memory': None, 'unreachable_lines': 1}
+        new = dict(old, time=2.0, forks=3)
+
+        regressions = compare({'case': {'metrics': new}}, {'case': {'metrics': old}})
+
+        self.assertEqual(2, len(regressions))
+
+
+if __name__ == '__main__':
+    unittest.main()
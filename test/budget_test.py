@@ -0,0 +1,77 @@
+import ast
+import time
+import unittest
+from path_solver import LIMITED, SPENT
+from path_visitor import UnreachablePathVisitor
+
+
+class BudgetTest(unittest.TestCase):
+    def test_query_rlimit(self):
+        code = """def example(x):
+    if x > 0 and x < 0:
+        return 1
+    return 0
+                """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(query_rlimit=1)
+        output = visitor.visit(tree)
+
+        # the line is only unreachable if the solver says so, so it is undecided instead
+        self.assertListEqual([], output)
+        self.assertDictEqual({2: LIMITED}, visitor.undecided)
+        self.assertGreater(visitor.stats['unknown'], 0)
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(query_rlimit=100000)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([3], output)
+        self.assertDictEqual({}, visitor.undecided)
+
+    def test_function_budget(self):
+        n = 40
+        args = ', '.join('x' + str(i) for i in range(n))
+        guards = ''.join(f"""
+    if x{i} > y:
+        y = y + x{i}""" for i in range(n))
+        code = f"""def slow({args}):
+    y = 0{guards}
+    return y
+
+def example(x):
+    if x > 0 and x < 0:
+        return 1
+    return 0
+    print("This will never be reached")
+            """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(function_budget=0)
+        output = visitor.visit(tree)
+
+        # every branch is merged once the budget has run out, so the only forks are the one for each function
+        self.assertListEqual([2 * n + 9], output)
+        self.assertEqual(SPENT, visitor.undecided[2 * n + 6])
+        self.assertEqual(2, visitor.stats['forks'])
+        self.assertEqual(0, visitor.stats['solver_checks'])
+
+    def test_file_budget(self):
+        code = """def example(x):
+    if x > 0:
+        if x < 0:
+            return 1
+    return 0
+                """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(file_budget=0)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([], output)
+        self.assertDictEqual({2: SPENT, 3: SPENT}, visitor.undecided)
+        self.assertEqual(0, visitor.stats['solver_checks'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -213,37 +213,100 @@ class ExprTest(unittest.TestCase):
 
         self.assertListEqual([4], output)
 
-    # def test_unreachable_bin_floorDiv(self):
-    #     code = """def example(x):
-    #                 y = 3 // 2
-    #                 if y == 1:
-    #                     c = 2
-    #                 else:
-    #                     c = 1
-    #                 return False
-    #     """
-    #
-    #     tree = ast.parse(code)
-    #     visitor = UnreachablePathVisitor()
-    #     output = visitor.visit(tree)
-    #
-    #     self.assertListEqual([6], output)
-    #
-    # def test_unreachable_bin_mod(self):
-    #     code = """def example(x):
-    #                 y = 3 % 2
-    #                 if y == 1:
-    #                     c = 2
-    #                 else:
-    #                     c = 1
-    #                 return False
-    #     """
-    #
-    #     tree = ast.parse(code)
-    #     visitor = UnreachablePathVisitor()
-    #     output = visitor.visit(tree)
-    #
-    #     self.assertListEqual([6], output)
+    def test_unreachable_bin_floorDiv(self):
+        code = """def example(x):
+                    y = 3 // 2
+                    if y == 1:
+                        c = 2
+                    else:
+                        c = 1
+                    return False
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([6], output)
+
+    def test_unreachable_bin_mod(self):
+        code = """def example(x):
+                    y = 3 % 2
+                    if y == 1:
+                        c = 2
+                    else:
+                        c = 1
+                    return False
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([6], output)
+
+    def test_unreachable_bin_floorDiv_negative(self):
+        code = """def example(x):
+                    y = -7 // 2
+                    z = 7.5 // -2
+                    if y == -4 and z == -4:
+                        c = 2
+                    else:
+                        c = 1
+                    return False
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([7], output)
+
+    def test_unreachable_bin_mod_symbolic(self):
+        code = """def example(x):
+                    y = x % 3
+                    if y < 0 or y >= 3:
+                        return True
+                    return False
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([4], output)
+
+    def test_range_params_are_ints(self):
+        code = """def example(n):
+                    for i in range(n):
+                        pass
+                    if n > 0 and n < 1:
+                        return True
+                    return False
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([5], output)
+
+    def test_range_params_used_before_range(self):
+        # n is only an int on the paths that reach the range
+        code = """def example(n):
+                    if n > 0 and n < 1:
+                        return 1
+                    for i in range(n):
+                        if n > 0 and n < 1:
+                            return 2
+                    return 0
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([6], output)
 
     def test_unreachable_bin_pow(self):
         code = """def example(x):
@@ -261,6 +324,45 @@ class ExprTest(unittest.TestCase):
 
         self.assertListEqual([6], output)
 
+    def test_concrete_branches(self):
+        # the constants are evaluated by python, so no branch reaches the solver
+        code = """def example(x):
+                    y = 6
+                    z = y // 4 % 3
+                    if y > 3 and not z:
+                        return 1
+                    while True:
+                        if -1:
+                            break
+                        else:
+                            x = 2
+                    return x
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([5, 10], output)
+        # only the break checks that its path is feasible
+        self.assertEqual(1, visitor.stats['solver_checks'])
+        self.assertGreater(visitor.stats['concrete'], 0)
+
+    def test_concrete_division_by_zero(self):
+        # python raises, which is left to z3 like a symbolic division
+        code = """def example(x):
+                    y = 1 / 0
+                    if y == x:
+                        return 1
+                    return 0
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([], output)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -81,6 +81,65 @@ def some_function():
 
         self.assertListEqual([12], output)
 
+    def test_call_summarised_once(self):
+        code = """def add_one(num):
+    if num > 0:
+        return num + 1
+    return 1
+
+def example(x):
+    a = add_one(x)
+    b = add_one(x - 1)
+    if a < 1 or b < 1:
+        return 0
+    return a + b
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([10], output)
+        self.assertEqual(1, len(visitor.summaries))
+
+    def test_call_raises(self):
+        code = """def check(n):
+    if n < 0:
+        raise ValueError()
+    return n
+
+def example(x):
+    y = check(x)
+    if x < 0:
+        return 0
+    return y
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([9], output)
+
+    def test_recursive_call_in_expression(self):
+        code = """def f(n):
+    if n <= 0:
+        return 0
+    return n + f(n - 1)
+
+def example(x):
+    y = f(x)
+    if x > 0 and x < 0:
+        return y
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([9], output)
+
     # def test_instance_methods(self):
     #     code = """class Calculator:
     #     def add(self, a, b):
@@ -118,6 +118,23 @@ class IfElseTest(unittest.TestCase):
 
         self.assertListEqual([6, 16], output)
 
+    def test_reassigned_after_branch(self):
+        code = """def example(x):
+    if x > 0:
+        x = -1
+        if x < 0:
+            y = 1
+        else:
+            y = 2
+    return 0
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([7], output)
+
     def test_combined(self):
         code = """def example(x, y):
     z = x - y
@@ -1,6 +1,8 @@
 import ast
+import contextlib
+import io
 import unittest
-from path_visitor import UnreachablePathVisitor
+from path_visitor import UNSUPPORTED_LOOP, UnreachablePathVisitor
 
 
 class LoopTest(unittest.TestCase):
@@ -110,6 +112,25 @@ class LoopTest(unittest.TestCase):
 
         self.assertListEqual([3], output)
 
+    def test_unsupported_for_iterable(self):
+        code = """def example(xs):
+                        for x in xs:
+                           print(x)
+                        for y in xs.keys():
+                           print(y)
+                        return 6
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            output = visitor.visit(tree)
+
+        self.assertListEqual([], output)
+        self.assertDictEqual({2: UNSUPPORTED_LOOP, 4: UNSUPPORTED_LOOP}, visitor.undecided)
+        self.assertEqual('', stdout.getvalue())
+
     def test_unreachable_for_variables(self):
         code = """def example(x):
                         y = 5
@@ -166,6 +187,337 @@ def example(x):
 
         self.assertListEqual([], output)
 
+    def test_unrolled_code_after_while(self):
+        code = """def example(x):
+                        i = 5
+                        while (True):
+                           i += 1
+                           if i > 15:
+                             print("not yet")
+                           elif i > 16:
+                             break
+                        return 5
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(unroll=4)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([8, 9], output)
+
+    def test_unrolled_while_counter(self):
+        code = """def example(x):
+    i = 0
+    while i < 10:
+        i += 1
+    if i < 10:
+        return 1
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(unroll=4)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([6], output)
+
+    def test_unrolled_for_accumulator(self):
+        code = """def example(x):
+    total = 0
+    for i in range(3):
+        total += i
+        if i > 5:
+            return 1
+    if total > 3:
+        return 2
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(unroll=8)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([6, 8], output)
+
+    def test_unrolled_bound_exceeded(self):
+        code = """def example(x):
+    total = 0
+    for i in range(3):
+        total += i
+    if total > 3:
+        return 2
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(unroll=2)
+        output = visitor.visit(tree)
+
+        # the loop goes on past the unrolled iterations, so total is unknown
+        self.assertListEqual([], output)
+
+    def test_unrolled_break_continue(self):
+        code = """def example(x):
+    i = 0
+    while True:
+        i += 1
+        if i < 3:
+            continue
+        break
+        print(i)
+    if i < 3:
+        return 1
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(unroll=4)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([8, 10], output)
+
+    def test_unrolled_for_else(self):
+        code = """def example(x):
+    for i in range(0, 5):
+        if i == 7:
+            break
+    else:
+        return 1
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(unroll=8)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([4, 7], output)
+
+    def test_unrolled_symbolic_bound(self):
+        code = """def example(x):
+    i = 0
+    while i < x:
+        i += 1
+        if i < 0:
+            print(i)
+    if i < 0:
+        return 1
+    return i
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(unroll=100)
+        output = visitor.visit(tree)
+
+        # stops unrolling once an iteration reaches no new line, then havocs i, which loses i >= 0 inside the loop
+        self.assertListEqual([8], output)
+        self.assertLess(visitor.stats['queries'], 20)
+
+    def test_widened_symbolic_bound(self):
+        code = """def example(x):
+    i = 0
+    while i < x:
+        i += 1
+        if i < 0:
+            print(i)
+    if i < 0:
+        return 1
+    return i
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(widen=True)
+        output = visitor.visit(tree)
+
+        # i >= 0 is inferred as an invariant
+        self.assertListEqual([6, 8], output)
+
+    def test_widened_counter(self):
+        code = """def example(x):
+    i = 0
+    total = 0
+    while i < 1000000:
+        i += 1
+        total = total + i
+    if i < 1000000:
+        return 1
+    if total < 0:
+        return 2
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(widen=True)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([8, 10], output)
+        self.assertLess(visitor.stats['queries'], 30)
+
+    def test_widened_code_after_while(self):
+        code = """def example(x):
+                        i = 5
+                        while (True):
+                           i += 1
+                           if i > 15:
+                             print("not yet")
+                           elif i > 16:
+                             break
+                        return 5
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(widen=True)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([8, 9], output)
+
+    def test_widened_never_entered(self):
+        code = """def example(x):
+    while x > 1 and x < 0:
+        x = 1
+    else:
+        x = 2
+    return x
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(widen=True)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([3], output)
+
+    def test_range_closed_form(self):
+        code = """def example(x):
+    total = 0
+    count = 0
+    for i in range(N):
+        total += i
+        count = count + 2
+        if i >= N:
+            print(i)
+    if count != 2 * N:
+        return 1
+    if total != N * (N - 1) / 2:
+        return 2
+    if i != N - 1:
+        return 3
+    return 0
+"""
+
+        queries = []
+        for n in [2, 1000]:
+            tree = ast.parse(code.replace('N', str(n)))
+            visitor = UnreachablePathVisitor()
+            output = visitor.visit(tree)
+
+            self.assertListEqual([8, 10, 12, 14], output)
+            queries.append(visitor.stats['queries'])
+
+        # the body is walked once, whatever the length of the range
+        self.assertEqual(queries[0], queries[1])
+
+    def test_range_step(self):
+        code = """def example(x):
+    s = 0
+    for i in range(10, 0, -2):
+        s += 1
+    if s == 5:
+        return 1
+    return 0
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([7], output)
+
+    def test_range_symbolic(self):
+        code = """def example(n):
+    s = 0
+    m = 0
+    for i in range(0, n):
+        s += 3
+        if i > m:
+            m = i
+        if s < 0:
+            return 1
+    if s < 0 or m < 0:
+        return 2
+    return s
+"""
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([9, 11], output)
+
+
+    def test_havoc_float_increment(self):
+        # s starts as an int, but the loop makes it a float, so it is 0.5 after one iteration
+        code = """def example(n):
+    s = 0
+    for i in range(n):
+        if i >= 0:
+            s = s + 0.5
+    if s > 0 and s < 1:
+        return 1
+    return 0
+"""
+
+        for options in [{}, {'widen': True}, {'unroll': 1}]:
+            tree = ast.parse(code)
+            output = UnreachablePathVisitor(**options).visit(tree)
+
+            self.assertListEqual([], output, options)
+
+    def test_widened_float_increment(self):
+        code = """def example(n):
+    s = 0
+    t = 0
+    while t < n:
+        t = t + 1
+        s = s + 0.5
+    if s > 0 and s < 1:
+        return 1
+    return 0
+"""
+
+        tree = ast.parse(code)
+        output = UnreachablePathVisitor(widen=True).visit(tree)
+
+        self.assertListEqual([], output)
+
+        code = """def example():
+    i = 0
+    while i < 3:
+        if i > 0 and i < 1:
+            return 5
+        i = i + 0.5
+    return 0
+"""
+
+        tree = ast.parse(code)
+        output = UnreachablePathVisitor(widen=True).visit(tree)
+
+        self.assertListEqual([], output)
+
+    def test_widened_int_increment(self):
+        # every value the loop gives i is an int, so it stays one
+        code = """def example(n):
+    i = 0
+    while i < n:
+        i = i + 2 * (i // 3) + 1
+    if i > 0 and i < 1:
+        return 1
+    return 0
+"""
+
+        tree = ast.parse(code)
+        output = UnreachablePathVisitor(widen=True).visit(tree)
+
+        self.assertListEqual([6], output)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,88 @@
+import ast
+import unittest
+from path_visitor import UnreachablePathVisitor
+
+
+class MergeTest(unittest.TestCase):
+    def test_consecutive(self):
+        code = """def example(x, y):
+    if x > 0:
+        y = -1
+    else:
+        x = -1
+        y = 10
+
+    if x > 0 and y > 0:
+        return x
+    else:
+        return y
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(merge=True)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([9], output)
+        # only the function itself is forked
+        self.assertEqual(1, visitor.stats['forks'])
+
+    def test_one_branch_returns(self):
+        code = """def example(x):
+    y = 0
+    if x > 0:
+        return x
+    else:
+        y = 1
+
+    if y == 0:
+        return 0
+    return y
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(merge=True)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([9], output)
+
+    def test_call_both_branches_return(self):
+        code = """def sign(n):
+    if n > 0:
+        return 1
+    else:
+        return -1
+
+def example(x):
+    if sign(x) == 0:
+        return 0
+    return 1
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(merge=True)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([9], output)
+
+    def test_many_sequential_ifs(self):
+        n = 40
+        args = ', '.join('x' + str(i) for i in range(n))
+        guards = ''.join(f"""
+    if x{i} > 0:
+        y = y + 1""" for i in range(n))
+        code = f"""def example({args}):
+    y = 0{guards}
+    if y > {n}:
+        return 1
+    return 0
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(merge=True)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([2 * n + 4], output)
+
+
+if __name__ == '__main__':
+    unittest.main()
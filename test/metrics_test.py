@@ -0,0 +1,111 @@
+import ast
+import unittest
+from metrics import AnalysisHooks, LineProfiler, MetricsHooks
+from path_visitor import UnreachablePathVisitor
+
+
+class RecordingHooks(AnalysisHooks):
+    def __init__(self):
+        self.events = []
+
+    def on_check(self, node, result, duration, source, statistics):
+        self.events.append(('check', type(node).__name__, source))
+
+    def on_fork(self, node):
+        self.events.append(('fork', type(node).__name__))
+
+    def on_call(self, node, func, summarised, duration):
+        self.events.append(('call', func.name, summarised))
+
+    def on_loop(self, node, duration):
+        self.events.append(('loop', type(node).__name__))
+
+
+class MetricsTest(unittest.TestCase):
+    def test_events(self):
+        code = """def inc(x):
+    return x + 1
+
+def example(x):
+    y = inc(x)
+    z = inc(y)
+    if z < x:
+        return 1
+    while x < 0:
+        x = x + 1
+    return 0
+"""
+        hooks = RecordingHooks()
+        tree = ast.parse(code)
+        output = UnreachablePathVisitor(hooks=hooks).visit(tree)
+
+        self.assertListEqual([8], output)
+        self.assertIn(('fork', 'FunctionDef'), hooks.events)
+        self.assertIn(('check', 'If', 'solver'), hooks.events)
+        self.assertIn(('loop', 'While'), hooks.events)
+        self.assertEqual(1, hooks.events.count(('call', 'inc', True)))
+        self.assertEqual(1, hooks.events.count(('call', 'inc', False)))
+
+    def test_metrics_hooks(self):
+        code = """def example(x):
+    if x > 0:
+        if x < 0:
+            return 1
+    return 0
+"""
+        hooks = MetricsHooks()
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(hooks=hooks)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([4], output)
+        self.assertEqual(visitor.stats['queries'], hooks.counts['checks'])
+        self.assertEqual(visitor.stats['solver_checks'], hooks.counts['checks_solver'])
+        self.assertEqual(visitor.stats['forks'], hooks.counts['forks'])
+        self.assertEqual(1, hooks.counts['checks_unsat'])
+        self.assertGreater(hooks.z3_statistics['max memory'], 0)
+
+    def test_merge_worker(self):
+        hooks = MetricsHooks()
+        worker = hooks.worker_hooks()
+        worker.on_loop(None, 0.5)
+        worker.add_statistics({'conflicts': 2, 'max memory': 3.0})
+        hooks.add_statistics({'conflicts': 1, 'max memory': 5.0})
+        hooks.merge_worker(worker)
+
+        self.assertEqual(1, hooks.counts['loops'])
+        self.assertEqual(0.5, hooks.durations['loops'])
+        self.assertEqual(3, hooks.z3_statistics['conflicts'])
+        self.assertEqual(5.0, hooks.z3_statistics['max memory'])
+
+    def test_line_profiler(self):
+        code = """def inc(x):
+    if x > 0:
+        return x + 1
+    return 1
+
+def example(x):
+    y = inc(x)
+    if y < 0:
+        return 1
+    return 0
+"""
+        profiler = LineProfiler()
+        tree = ast.parse(code)
+        output = UnreachablePathVisitor(hooks=profiler).visit(tree)
+
+        self.assertListEqual([9], output)
+        self.assertEqual(1, profiler.lines[7]['calls'])
+        self.assertEqual('example', profiler.functions[8])
+        self.assertEqual(2, profiler.lines[8]['checks'])
+        self.assertEqual('inc', profiler.functions[2])
+        self.assertEqual([], profiler.stack)
+
+        stacks = profiler.format_stacks('file.py').splitlines()
+        self.assertTrue(any(stack.startswith('file.py;example;inc;line 2 ') for stack in stacks))
+        self.assertTrue(any(stack.startswith('file.py;example;line 8 ') for stack in stacks))
+        self.assertEqual({7, 8, 2}, {lineno for lineno, _, _ in profiler.hotspots(3)})
+
+
+if __name__ == '__main__':
+    unittest.main()
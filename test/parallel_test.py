@@ -0,0 +1,52 @@
+import ast
+import unittest
+from path_visitor import UnreachablePathVisitor
+
+
+class ParallelTest(unittest.TestCase):
+    def test_functions_parallel(self):
+        code = """def add_one(num):
+    return num + 1
+
+def example(x):
+    if add_one(x) > x:
+        return 0
+    return 1
+
+def example2():
+    return 1
+    print("This will never be reached")
+            """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(function_workers=2)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([7, 11], output)
+        self.assertDictEqual({}, visitor.errors)
+
+    def test_function_timeout(self):
+        n = 120
+        args = ', '.join('x' + str(i) for i in range(n))
+        guards = ''.join(f"""
+    if x{i} > 0:
+        y = y + 1""" for i in range(n))
+        code = f"""def slow({args}):
+    y = 0{guards}
+    return y
+
+def example():
+    return 1
+    print("This will never be reached")
+            """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(function_workers=2, function_timeout=1)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([2 * n + 7], output)
+        self.assertListEqual(['slow'], list(visitor.errors))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathfinder import EXIT_FAILED, EXIT_FOUND, analyze_files, collect_files, iter_results, write_jsonl
+from path_visitor import Finding
+
+
+class PathfinderTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.write('a.py', """def example():
+    return 1
+    print("This will never be reached")
+""")
+        self.write(os.path.join('pkg', 'b.py'), """def example(x):
+    if x > 0:
+        return x
+    return 0
+""")
+        self.write(os.path.join('pkg', 'c.txt'), """def example(x)
+""")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, name, code):
+        path = os.path.join(self.dir.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(code)
+
+    def path(self, name):
+        return os.path.join(self.dir.name, name)
+
+    def test_collect_files(self):
+        files = collect_files([self.dir.name, self.path('*.py'), self.path(os.path.join('pkg', '*.txt'))])
+
+        self.assertListEqual([self.path('a.py'), self.path(os.path.join('pkg', 'b.py')),
+                              self.path(os.path.join('pkg', 'c.txt'))], files)
+
+    def test_analyze_files_serial(self):
+        results = analyze_files([self.dir.name, self.path(os.path.join('pkg', 'c.txt'))], workers=1)
+
+        self.assertListEqual([[3], [], []], [result['lines'] for result in results])
+        self.assertListEqual([None, None], [result['error'] for result in results[:2]])
+        self.assertIsNotNone(results[2]['error'])
+
+    def test_analyze_files_parallel(self):
+        results = analyze_files([self.dir.name], workers=2)
+
+        self.assertListEqual([[3], []], [result['lines'] for result in results])
+
+    def test_analyze_files_timeout(self):
+        n = 120
+        args = ', '.join('x' + str(i) for i in range(n))
+        guards = ''.join(f"""
+    if x{i} > 0:
+        y = y + 1""" for i in range(n))
+        self.write('slow.py', f"""def example({args}):
+    y = 0{guards}
+    return y
+""")
+
+        results = analyze_files([self.path('slow.py')], workers=1, timeout=0.5)
+
+        self.assertIn('timed out', results[0]['error'])
+
+    def test_analyze_files_undecided(self):
+        results = analyze_files([self.dir.name], workers=1, query_rlimit=1)
+
+        # a line after a return is unreachable without asking the solver
+        self.assertListEqual([[3], []], [result['lines'] for result in results])
+        self.assertListEqual([[], [2]], [result['undecided'] for result in results])
+
+    def test_iter_results(self):
+        self.write('two.py', """def first(x):
+    return 1
+    x = 2
+
+def second(x):
+    if x > 0 and x < 0:
+        return 1
+    return 0
+""")
+
+        items = iter_results([self.path('two.py')], workers=1)
+        finding = next(items)
+
+        # the first function's finding comes before the second function is analyzed
+        self.assertIsInstance(finding, Finding)
+        self.assertEqual(('first', 3), (finding.function, finding.line))
+
+        rest = list(items)
+        self.assertEqual(('second', 7), (rest[0].function, rest[0].line))
+        self.assertIn('always false', rest[0].reason)
+        self.assertListEqual([3, 7], rest[1]['lines'])
+
+    def test_iter_results_as_completed(self):
+        # the first file takes seconds, and the second one is yielded as soon as it is done
+        slow = ''.join(f"""def example{i}(a, b):
+    if a * b > {i}:
+        a = a - b
+    if a * a < b * b and a > b and b > 0:
+        return 1
+    return 0
+
+""" for i in range(150))
+        self.write('slow.py', slow)
+        self.write('tail.py', """def example():
+    return 1
+    x = 2
+""")
+
+        items = iter_results([self.path('slow.py'), self.path('tail.py')], workers=2)
+        results = [item for item in items if not isinstance(item, Finding)]
+
+        self.assertListEqual([self.path('tail.py'), self.path('slow.py')], [result['path'] for result in results])
+        self.assertEqual(150, len(results[1]['lines']))
+
+        results = analyze_files([self.path('slow.py'), self.path('tail.py')], workers=2)
+        self.assertListEqual([self.path('slow.py'), self.path('tail.py')], [result['path'] for result in results])
+
+    def test_exit_status(self):
+        def run(*args):
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            command = [sys.executable, os.path.join(root, 'pathfinder.py'), '-j', '1', *args]
+            return subprocess.run(command, capture_output=True, text=True).returncode
+
+        self.write('bad.py', """def example(x)
+""")
+
+        self.assertEqual(0, run(self.path(os.path.join('pkg', 'b.py'))))
+        self.assertEqual(0, run(self.path('a.py')))
+        self.assertEqual(EXIT_FOUND, run(self.path('a.py'), '--fail-on-findings'))
+        self.assertEqual(EXIT_FAILED, run(self.path('a.py'), self.path('bad.py'), '--fail-on-findings'))
+        self.assertEqual(EXIT_FAILED, run(self.path('bad.py'), '--format', 'jsonl'))
+
+    def test_write_jsonl(self):
+        file = io.StringIO()
+        write_jsonl(iter_results([self.dir.name], workers=1), file)
+        records = [json.loads(line) for line in file.getvalue().splitlines()]
+
+        self.assertListEqual(['finding', 'file', 'file'], [record['type'] for record in records])
+        self.assertEqual(self.path('a.py'), records[0]['path'])
+        self.assertEqual(3, records[0]['line'])
+        self.assertListEqual([], records[2]['lines'])
+
+
+if __name__ == '__main__':
+    unittest.main()
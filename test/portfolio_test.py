@@ -0,0 +1,60 @@
+import ast
+import unittest
+from z3 import *
+from path_portfolio import SolverPortfolio, relax
+from path_solver import LIMITED
+from path_visitor import UnreachablePathVisitor
+
+
+class PortfolioTest(unittest.TestCase):
+    def test_get_configurations(self):
+        portfolio = SolverPortfolio(4)
+
+        self.assertListEqual(['fresh', 'tactic', 'reals', 'arith'], portfolio.get_configurations('QF_NIA'))
+        self.assertListEqual(['fresh', 'tactic', 'arith', 'seed1'], portfolio.get_configurations('QF_NRA'))
+        self.assertListEqual(['fresh', 'arith', 'seed1', 'seed2'], portfolio.get_configurations(None))
+        self.assertListEqual(['fresh'], SolverPortfolio(1).get_configurations('QF_NIA'))
+
+    def test_race(self):
+        x, y = Ints('x y')
+        portfolio = SolverPortfolio(4)
+
+        result, name = portfolio.race([x * x == 2], 'QF_NIA', 30)
+        self.assertEqual(unsat, result)
+        self.assertIn(name, portfolio.get_configurations('QF_NIA'))
+
+        result, _ = portfolio.race([x * y == 12, x > 3, y > 1], 'QF_NIA', 30)
+        self.assertEqual(sat, result)
+
+    def test_relax(self):
+        x, y = Ints('x y')
+        relaxed = {}
+        conds = relax([x * x == 2, If(x > y, x, -y) >= 3], relaxed)
+
+        self.assertEqual(2, len(relaxed))
+        self.assertTrue(all(is_real(const) for const in relaxed.values()))
+        self.assertTrue(all(is_bool(cond) for cond in conds))
+
+        # integer division rounds, which the reals don't
+        self.assertIsNone(relax([x / y == 2], {}))
+
+    def test_undecided_race(self):
+        # no configuration decides whether a sum of two cubes of integers can be a cube
+        code = """def example(a, b, c):
+    if a // 1 == a and b // 1 == b and c // 1 == c:
+        if a > 0 and b > 0 and a * a * a + b * b * b == c * c * c:
+            return 1
+    return 0
+                """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(samples=0, witnesses=0, query_timeout=1, portfolio=2, portfolio_after=0.001)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([], output)
+        self.assertDictEqual({3: LIMITED}, visitor.undecided)
+        self.assertGreater(visitor.stats['portfolio'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import ast
+import unittest
+from z3 import *
+from path_solver import PathSolver, QueryCache
+from path_visitor import UnreachablePathVisitor
+
+
+class QueryCacheTest(unittest.TestCase):
+    def test_key_canonical(self):
+        cache = QueryCache()
+        x, y, a, b = Reals('var0 var1 var2 var3')
+
+        key = cache.key([x > 0, And(y < x, y > 1)])
+        self.assertEqual(key, cache.key([And(b > 1, b < a), a > 0]))
+        self.assertNotEqual(key, cache.key([And(b > 1, b < a), a > 1]))
+
+    def test_lru_eviction(self):
+        cache = QueryCache(size=2)
+        cache.put('a', sat)
+        cache.put('b', unsat)
+        cache.get('a')
+        cache.put('c', sat)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(sat, cache.get('a'))
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_large_terms_uncached(self):
+        cache = QueryCache()
+        xs = Reals(' '.join(f'var{i}' for i in range(QueryCache.MAX_TERM_SIZE)))
+
+        self.assertIsNotNone(cache.key([xs[0] > 0]))
+        self.assertIsNone(cache.key([xs[0] > 0, Sum(xs) > 0]))
+
+    def test_split(self):
+        x, y = Reals('var0 var1')
+        solver = PathSolver()
+        solver.add(x > 0)
+
+        other = solver.fork()
+        solver.add(y > 0)
+        other.add(y < 0)
+        other.add(x < 5)
+
+        common, own, others = solver.split(other)
+        self.assertEqual(1, common[2])
+        self.assertEqual([y > 0], own)
+        self.assertEqual([y < 0, x < 5], others)
+
+    def test_slice(self):
+        x, y, z = Reals('var0 var1 var2')
+        solver = PathSolver(cache=QueryCache())
+        solver.add(x > 0)
+        solver.add(y > x)
+        solver.add(z > 0)
+        solver.add(BoolVal(False))
+
+        self.assertEqual([x > 0, y > x, False], solver.get_slice(solver.as_list(), y < 0))
+        self.assertEqual([z > 0, False], solver.get_slice(solver.as_list(), z < 0))
+
+        solver.push()
+        solver.add(z > y)
+        self.assertEqual(5, len(solver.get_slice(solver.as_list(), x < 0)))
+        solver.pop()
+        self.assertEqual([x > 0, y > x, False], solver.get_slice(solver.as_list(), y < 0))
+
+    def test_independent_guards_hit(self):
+        # the guards on a and b don't share variables, so each query only holds those of one of them
+        code = """def example(a, b):
+    if a > 0:
+        x = 1
+    else:
+        x = 2
+    if b > 0:
+        y = 1
+    else:
+        y = 2
+    if a > 1 and x == 2:
+        return 1
+    if b > 1 and y == 2:
+        return 2
+    return 0
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([11, 13], output)
+        self.assertGreater(visitor.stats['sliced'], 0)
+        self.assertGreater(visitor.query_cache.hits, visitor.stats['solver_checks'])
+
+    def test_repeated_queries_hit(self):
+        code = """def example(x):
+    if x > 5:
+        return True
+    elif x > 6:
+        return False
+    return True
+
+def example2(y):
+    if y > 5:
+        return True
+    elif y > 6:
+        return False
+    return True
+        """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([5, 12], output)
+        self.assertEqual(visitor.query_cache.hits, visitor.query_cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()
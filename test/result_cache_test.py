@@ -0,0 +1,87 @@
+import ast
+import tempfile
+import unittest
+from path_visitor import UnreachablePathVisitor
+from result_cache import ResultCache, function_key
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def key(self, code, name):
+        tree = ast.parse(code)
+        functions = {stmt.name: stmt for stmt in tree.body if isinstance(stmt, ast.FunctionDef)}
+        return function_key(functions[name], functions, [], {})
+
+    def test_key_ignores_position(self):
+        code = """def example(x):
+    return add_one(x)
+
+def add_one(num):
+    return num + 1
+        """
+
+        self.assertEqual(self.key(code, 'example'), self.key('\n\n' + code, 'example'))
+
+    def test_key_changes_with_callee(self):
+        code = """def example(x):
+    return add_one(x)
+
+def add_one(num):
+    return num + 1
+
+def unused(num):
+    return num
+        """
+
+        key = self.key(code, 'example')
+        self.assertNotEqual(key, self.key(code.replace('num + 1', 'num + 2'), 'example'))
+        self.assertEqual(key, self.key(code.replace('return num\n', 'return 0\n'), 'example'))
+
+    def test_cached_result_served(self):
+        code = """def example():
+    return 1
+    print("This will never be reached")
+        """
+
+        output = UnreachablePathVisitor(cache_dir=self.dir.name).visit(ast.parse(code))
+        self.assertListEqual([3], output)
+
+        shifted = '\n\n' + code
+        output = UnreachablePathVisitor(cache_dir=self.dir.name).visit(ast.parse(shifted))
+        self.assertListEqual([5], output)
+
+        # replace the stored entry, to check that the second run doesn't analyse the function again
+        tree = ast.parse(shifted)
+        cache = ResultCache(self.dir.name)
+        cache.put(function_key(tree.body[0], {'example': tree.body[0]}, [], UnreachablePathVisitor().get_options()),
+                  tree.body[0].lineno, {4: 'cached.'})
+        cache.close()
+
+        output = UnreachablePathVisitor(cache_dir=self.dir.name).visit(tree)
+        self.assertListEqual([4], output)
+
+
+    def test_cached_result_after_blank_lines(self):
+        code = """def example(x):
+    if x > 0 and x < 0:
+        return 1
+    return 0
+        """
+
+        output = UnreachablePathVisitor(cache_dir=self.dir.name).visit(ast.parse(code))
+        self.assertListEqual([3], output)
+
+        # the lines inside the function move, so the stored offsets no longer apply
+        edited = code.replace('(x):\n', '(x):\n    # a comment\n\n\n')
+        self.assertNotEqual(self.key(code, 'example'), self.key(edited, 'example'))
+
+        output = UnreachablePathVisitor(cache_dir=self.dir.name).visit(ast.parse(edited))
+        self.assertListEqual([6], output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import ast
+import unittest
+from z3 import *
+from path_sampler import PathSampler
+from path_visitor import UnreachablePathVisitor
+
+
+class SamplerTest(unittest.TestCase):
+    def test_nonlinear_branches_sampled(self):
+        code = """def example(x, y):
+    if x * y > 10:
+        y = x * x
+    if x * x + y * y < 0:
+        return 1
+    return 0
+                """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        # samples can't show a branch unreachable, so that is left to z3
+        self.assertListEqual([5], output)
+        self.assertGreater(visitor.stats['sampled'], 0)
+        self.assertLess(visitor.stats['solver_checks'], visitor.stats['queries'])
+
+    def test_disabled(self):
+        code = """def example(x, y):
+    if x * y > 10:
+        return 1
+    return 0
+                """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor(samples=0)
+        output = visitor.visit(tree)
+
+        self.assertListEqual([], output)
+        self.assertEqual(0, visitor.stats['sampled'])
+        self.assertEqual(visitor.stats['queries'], visitor.stats['solver_checks'])
+
+    def test_linear_queries_not_sampled(self):
+        code = """def example(x, y):
+    if x + y > 10:
+        return 1
+    return 0
+                """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        visitor.visit(tree)
+
+        self.assertEqual(0, visitor.stats['sampled'])
+
+    def test_bounds(self):
+        x, y = Ints('x y')
+        r = Real('r')
+        sampler = PathSampler()
+
+        # the values are drawn from the interval the comparisons give each constant
+        self.assertIsNotNone(sampler.sample([x > 1000, x < 1003, x * x > 1002 * 1001]))
+        self.assertIsNotNone(sampler.sample([x >= 40, x <= 40, y == 2, x * y == 80]))
+        self.assertIsNotNone(sampler.sample([r > 1, r < 2, r * r > 2]))
+
+    def test_exact(self):
+        x, y = Ints('x y')
+        r = Real('r')
+        sampler = PathSampler()
+
+        # no value is rounded into satisfying a condition
+        self.assertIsNone(sampler.sample([r * r == 2]))
+        self.assertIsNone(sampler.sample([r * 3 == 1, r > 0, r < 1]))
+        self.assertIsNone(sampler.sample([x > 3, x < 3]))
+        self.assertIsNone(sampler.sample([x / 0 == 1, x > 5]))
+        self.assertIsNotNone(sampler.sample([x > 5, x < 8, x / -2 == -3, x % 3 == 1, x * x == 49]))
+
+    def test_witnesses_reused(self):
+        code = """def example(x, y):
+    if x * y > 10:
+        x = x + 1
+    else:
+        y = y - 1
+    if x * x > y:
+        y = x * y
+    if x * x < 0:
+        return 1
+    return 0
+                """
+
+        outputs = []
+        for witnesses in [0, 8]:
+            tree = ast.parse(code)
+            visitor = UnreachablePathVisitor(samples=0, witnesses=witnesses)
+            outputs.append(visitor.visit(tree))
+
+            if witnesses == 0:
+                self.assertEqual(0, visitor.stats['reused'])
+            else:
+                # the model that reached a branch is tried on the branches after it
+                self.assertGreater(visitor.stats['reused'], 0)
+                self.assertLess(visitor.stats['solver_checks'], visitor.stats['queries'])
+
+        self.assertListEqual([9], outputs[0])
+        self.assertListEqual(outputs[0], outputs[1])
+
+    def test_reuse(self):
+        x, y = Ints('x y')
+        r = Real('r')
+        sampler = PathSampler(samples=0)
+
+        solver = Solver()
+        solver.add(x * y == 12, x > 3, r * r == 4, r > 0)
+        self.assertEqual(sat, solver.check())
+        witness = sampler.add_model(solver.model())
+
+        self.assertIs(witness, sampler.reuse([x * y == 12, x > 3, r * r == 4]))
+        self.assertIs(witness, sampler.reuse([x * x > 3, r * 3 > 5]))
+        self.assertIsNone(sampler.reuse([x * y == 12, x < 3]))
+
+        # a sample satisfying a query is a witness for the next ones
+        sampler.samples = 16
+        other = sampler.sample([x * y > 12, x < 3])
+        self.assertIsNotNone(other)
+        self.assertIs(other, sampler.reuse([x * y > 12, x < 3, y != 0]))
+        self.assertIs(witness, sampler.reuse([x * y == 12, x > 3, r > 1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
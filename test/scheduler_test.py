@@ -0,0 +1,179 @@
+import ast
+import unittest
+from path_scheduler import PathScheduler
+from path_visitor import UnreachablePathVisitor
+
+
+class SchedulerTest(unittest.TestCase):
+    def test_forks_of_forks(self):
+        # the paths forked by the else visitor of the first if walk the rest of the body too
+        code = """def example(a, b):
+    if a == 1:
+        x = 1
+    else:
+        x = 2
+    if b == 1:
+        y = 1
+    else:
+        y = 2
+    if a == 2 and b == 2:
+        return 1
+    return 0
+                    """
+
+        for strategy in PathScheduler.STRATEGIES:
+            tree = ast.parse(code)
+            output = UnreachablePathVisitor(strategy=strategy).visit(tree)
+
+            self.assertListEqual([], output, strategy)
+
+    def test_strategies(self):
+        code = """def example(x, y):
+    if x > 0:
+        y = -1
+    else:
+        x = -1
+        y = 10
+
+    if x > 0 and y > 0:
+        return x
+    elif y < 0:
+        return y
+    else:
+        return 0
+                    """
+
+        for strategy in PathScheduler.STRATEGIES:
+            tree = ast.parse(code)
+            output = UnreachablePathVisitor(strategy=strategy).visit(tree)
+
+            self.assertListEqual([9], output, strategy)
+
+    def test_max_states(self):
+        code = """def example(a, b, c):
+    if a > 0:
+        a = 1
+    else:
+        a = 0
+    if b > 0:
+        b = 1
+    else:
+        b = 0
+    if c > 0:
+        c = 1
+    else:
+        c = 0
+    if a + b + c > 3:
+        return 1
+    return 0
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([15], output)
+
+        tree = ast.parse(code)
+        limited = UnreachablePathVisitor(max_states=2)
+        output = limited.visit(tree)
+
+        # branches past the limit are merged, which still finds the line with fewer paths
+        self.assertListEqual([15], output)
+        self.assertLess(limited.stats['forks'], visitor.stats['forks'])
+
+    def test_subsumed_paths(self):
+        # both branches of each if bind the same values, so their paths are joined right after it
+        code = """def example(a, b, c):
+    y = 0
+    if a > 0:
+        x = 1
+    else:
+        x = 1
+    if b > 0:
+        y = 2
+    else:
+        y = 2
+    if c > 0:
+        pass
+    if x + y != 3:
+        return 1
+    return 0
+                    """
+
+        for strategy in PathScheduler.STRATEGIES:
+            tree = ast.parse(code)
+            visitor = UnreachablePathVisitor(strategy=strategy)
+            output = visitor.visit(tree)
+
+            self.assertListEqual([14], output, strategy)
+            self.assertEqual(3, visitor.stats['subsumed'], strategy)
+
+    def test_subsumed_keeps_lines_of_both(self):
+        # the line found unreachable inside the else branch is still reported once its path is joined
+        code = """def example(a):
+    x = 0
+    if a > 0:
+        b = 1
+    else:
+        b = 1
+        if a > 0:
+            return 0
+    if a > 0 and a < 0:
+        return 1
+    return b
+                    """
+
+        tree = ast.parse(code)
+        visitor = UnreachablePathVisitor()
+        output = visitor.visit(tree)
+
+        self.assertListEqual([8, 10], output)
+
+    def test_fork_in_nested_block(self):
+        # the path forked by the inner if goes on with the rest of the outer if's block, and the path returning
+        # from the inner if stops there
+        code = """def example(x):
+    if x > 0:
+        if x > 5:
+            return 1
+        y = 2
+        if x <= 5:
+            return 3
+    return 0
+                    """
+
+        for merge, strategy in [(True, 'bfs')] + [(False, strategy) for strategy in PathScheduler.STRATEGIES]:
+            tree = ast.parse(code)
+            output = UnreachablePathVisitor(merge=merge, strategy=strategy).visit(tree)
+
+            self.assertListEqual([], output, strategy)
+
+    def test_returned_path_stops(self):
+        # the path through the first if returns, so only the other path decides the second if
+        code = """def example(x):
+    if x > 0:
+        if x > 5:
+            return 1
+        if x > 5:
+            y = 1
+    if x > 0:
+        return 2
+    return 0
+                    """
+
+        for merge, strategy in [(True, 'bfs')] + [(False, strategy) for strategy in PathScheduler.STRATEGIES]:
+            tree = ast.parse(code)
+            output = UnreachablePathVisitor(merge=merge, strategy=strategy).visit(tree)
+
+            self.assertListEqual([6], output, strategy)
+
+    def test_unknown_strategy(self):
+        tree = ast.parse('def example(x):\n    return x\n')
+
+        with self.assertRaises(ValueError):
+            UnreachablePathVisitor(strategy='random').visit(tree)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from path_visitor import ScopeMap
+
+
+class ScopeMapTest(unittest.TestCase):
+    def test_set_unfrozen_in_place(self):
+        scope = ScopeMap()
+        self.assertIs(scope, scope.set('x', 1))
+        self.assertEqual(1, scope['x'])
+
+    def test_fork_isolated(self):
+        scope = ScopeMap({'x': 1, 'y': 2})
+        other = scope.fork()
+
+        scope = scope.set('x', 3)
+        other = other.set('y', 4)
+
+        self.assertDictEqual({'x': 3, 'y': 2}, scope.as_dict())
+        self.assertDictEqual({'x': 1, 'y': 4}, other.as_dict())
+
+    def test_flatten_deep_chain(self):
+        scope = ScopeMap()
+        for i in range(ScopeMap.MAX_DEPTH * 2):
+            scope = scope.fork().set('x' + str(i), i)
+
+        self.assertLessEqual(scope.depth, ScopeMap.MAX_DEPTH)
+        self.assertEqual(0, scope['x0'])
+        self.assertNotIn('missing', scope)
+
+
+if __name__ == '__main__':
+    unittest.main()